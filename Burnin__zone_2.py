@@ -10,40 +10,55 @@ from simtools.SetupParser import SetupParser
 from simtools.ModBuilder import ModBuilder, ModFn
 from dtk.interventions.outbreakindividual import recurring_outbreak
 from malaria.reports.MalariaReport import add_summary_report
+from equilibrium import recommended_serialize_years
+from table_io import load_table
+from simulation_helper import set_serialization, checkpoint_ladder, lazy_run_sim_args
+from calibration_helper import read_habitat_sweep, read_seed_sweep
 
 ## Import custom reporters
 
 SetupParser.default_block = 'HPC'
-numseeds = 10
+numseeds = 3  # first round, calibrate_habitat.py adds seeds where the likelihood is uncertain
 sim_start_year = 1960
 serialize_years = 50
+# Burnin_Equilibrium table of a previous burn-in (analyze_burnin_equilibrium.py) to serialize as early as it
+# recommends instead, the pickups' serialize_year must match
+equilibrium_table = None
+if equilibrium_table is not None:
+    serialize_years = recommended_serialize_years(load_table(equilibrium_table))
+# habitat multipliers proposed by calibrate_habitat.py for the next calibration round, None for the initial grid
+habitat_sweep_file = None
+# seeds added by calibrate_habitat.py to the current habitat multipliers, None for numseeds seeds of each
+seed_sweep_file = None
 
-cb = DTKConfigBuilder.from_defaults('MALARIA_SIM', Simulation_Duration=serialize_years * 365)
-
-cb.update_params({
-    'Demographics_Filenames': [os.path.join('Ghana', 'Ghana_2.5arcmin_demographics.json')],
-    "Air_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
-    "Land_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
-    "Rainfall_Filename": os.path.join('Ghana', 'Ghana_30arcsec_rainfall_daily.bin'),
-    "Relative_Humidity_Filename": os.path.join('Ghana', 'Ghana_30arcsec_relative_humidity_daily.bin'),
-    'x_Temporary_Larval_Habitat': 0.206478,
-    'Serialization_Time_Steps': [365 * serialize_years],
-    'Serialization_Type': 'TIMESTEP',
-    'Serialized_Population_Writing_Type': 'TIMESTEP',
-    'Serialized_Population_Reading_Type': 'NONE',
-    'Serialization_Mask_Node_Write': 0,
-    'Serialization_Precision': 'REDUCED',
-    "Age_Initialization_Distribution_Type": 'DISTRIBUTION_COMPLEX',
-    "Birth_Rate_Dependence": "FIXED_BIRTH_RATE",
-    'Disable_IP_Whitelist': 1,
-    'x_Base_Population': 1,
-    'x_Birth': 1
-})
-set_species(cb, ["arabiensis", "funestus", "gambiae"])
-set_larval_habitat(cb, {"arabiensis": {'TEMPORARY_RAINFALL': 7.5e9, 'CONSTANT': 1e7},
-                        "funestus": {'WATER_VEGETATION': 4e8},
-                        "gambiae": {'TEMPORARY_RAINFALL': 8.3e8, 'CONSTANT': 1e7}
-                        })
+
+def build_config():
+    """Config of the burn-in, built by build_experiment"""
+    cb = DTKConfigBuilder.from_defaults('MALARIA_SIM', Simulation_Duration=serialize_years * 365)
+
+    cb.update_params({
+        'Demographics_Filenames': [os.path.join('Ghana', 'Ghana_2.5arcmin_demographics.json')],
+        "Air_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
+        "Land_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
+        "Rainfall_Filename": os.path.join('Ghana', 'Ghana_30arcsec_rainfall_daily.bin'),
+        "Relative_Humidity_Filename": os.path.join('Ghana', 'Ghana_30arcsec_relative_humidity_daily.bin'),
+        'x_Temporary_Larval_Habitat': 0.206478,
+        'Serialized_Population_Reading_Type': 'NONE',
+        "Age_Initialization_Distribution_Type": 'DISTRIBUTION_COMPLEX',
+        "Birth_Rate_Dependence": "FIXED_BIRTH_RATE",
+        'Disable_IP_Whitelist': 1,
+        'x_Base_Population': 1,
+        'x_Birth': 1
+    })
+    # checkpoints every 5 years from year 20, pickups start from the latest one at or before their serialize_year
+    set_serialization(cb, serialize_years, True, ser_time_step=checkpoint_ladder(serialize_years, every=5, first=20))
+
+    set_species(cb, ["arabiensis", "funestus", "gambiae"])
+    set_larval_habitat(cb, {"arabiensis": {'TEMPORARY_RAINFALL': 7.5e9, 'CONSTANT': 1e7},
+                            "funestus": {'WATER_VEGETATION': 4e8},
+                            "gambiae": {'TEMPORARY_RAINFALL': 8.3e8, 'CONSTANT': 1e7}
+                            })
+    return cb
 
 
 def update_cb(cb, years, serialize, ser_time_step=None):
@@ -124,28 +139,44 @@ user = os.getlogin()  # user initials
 expt_name = f'{user}_FE_2022_burnin_ITN_zone_2_{serialize_years}'
 
 """BUILDER"""
-builder = ModBuilder.from_list([[ModFn(DTKConfigBuilder.set_param, 'Run_Number', x),
-                                ModFn(DTKConfigBuilder.set_param, 'x_Temporary_Larval_Habitat', hab_scale)]
-                                for hab_scale in [0.206478]
-                                for x in range(numseeds)
-                                ])
-# builder = ModBuilder.from_list([[ModFn(DTKConfigBuilder.set_param, 'Run_Number', x),
-#                                 ModFn(DTKConfigBuilder.set_param, 'x_Temporary_Larval_Habitat', hab_scale)]
-#                                 for hab_scale in np.logspace(-2, np.log10(2), 7, endpoint=False)
-#                                 for x in range(numseeds)
-#                                 ])
-
-
-run_sim_args = {
-    'exp_name': expt_name,
-    'config_builder': cb,
-    'exp_builder': builder
-}
+
+
+def sweep():
+    """Habitat multiplier and seed of each simulation"""
+    if habitat_sweep_file is None:
+        hab_scales = [0.206478]
+        # hab_scales = np.logspace(-2, np.log10(2), 7, endpoint=False)
+    else:
+        hab_scales = read_habitat_sweep(habitat_sweep_file)
+    if seed_sweep_file is None:
+        combos = [(hab_scale, x) for hab_scale in hab_scales for x in range(numseeds)]
+    else:
+        combos = read_seed_sweep(seed_sweep_file)
+    return [{'x_Temporary_Larval_Habitat': hab_scale, 'Run_Number': x} for hab_scale, x in combos]
+
+
+def build_experiment():
+    """run_sim_args of the experiment: its config and a builder of the sweep()"""
+    builder = ModBuilder.from_list([[ModFn(DTKConfigBuilder.set_param, 'Run_Number', params['Run_Number']),
+                                     ModFn(DTKConfigBuilder.set_param, 'x_Temporary_Larval_Habitat',
+                                           params['x_Temporary_Larval_Habitat'])]
+                                    for params in sweep()
+                                    ])
+    return {
+        'exp_name': expt_name,
+        'config_builder': build_config(),
+        'exp_builder': builder
+    }
+
+
+# run_sim_args is what the `dtk run` command will look for, built when it does (see lazy_run_sim_args)
+__getattr__ = lazy_run_sim_args(build_experiment)
+
 # If you prefer running with `python example_sim.py`, you will need the following block
 if __name__ == "__main__":
     SetupParser.init()
     exp_manager = ExperimentManagerFactory.init()
-    exp_manager.run_simulations(**run_sim_args)
+    exp_manager.run_simulations(**build_experiment())
     # Wait for the simulations to be done
     exp_manager.wait_for_finished(verbose=True)
     assert (exp_manager.succeeded())
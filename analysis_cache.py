@@ -0,0 +1,121 @@
+import os
+import glob
+import json
+import pickle
+import hashlib
+import uuid
+
+"""
+On-disk cache of analyzer select_simulation_data results, see CacheableAnalyzer.enable_cache in analyzer_base.py
+"""
+
+# analyzer attributes that do not change what select_simulation_data returns
+IGNORED_PARAMETERS = ['working_dir', 'expt_name', 'results', 'uid', 'cache', 'output_format']
+
+
+def output_fingerprint(simulation, filenames, hash_outputs=False):
+    """Size and mtime (and optionally sha1) of the simulation output files that can be read from this machine.
+    Without an output folder reachable from here (e.g. COMPS outputs off the network) the fingerprint is None,
+    and the key relies on the simulation id, as outputs of a finished simulation don't change."""
+    try:
+        sim_dir = simulation.get_path()
+    except Exception:
+        return None
+    if not sim_dir or not os.path.isdir(sim_dir):
+        return None
+    fingerprint = {}
+    for fname in filenames:
+        path = os.path.join(sim_dir, fname)
+        if not os.path.exists(path):
+            fingerprint[fname] = None
+            continue
+        stat = os.stat(path)
+        fingerprint[fname] = [stat.st_size, stat.st_mtime_ns]
+        if hash_outputs:
+            sha1 = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha1.update(chunk)
+            fingerprint[fname].append(sha1.hexdigest())
+    return fingerprint
+
+
+class AnalysisCache:
+
+    def __init__(self, cache_dir, max_size_mb=1024, hash_outputs=False):
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 ** 2
+        self.hash_outputs = hash_outputs
+        # hits are recorded on disk under this token: filter may run in worker processes, finalize in the main one
+        self.token = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.cache_dir, 'hits'), exist_ok=True)
+
+    def key(self, simulation, analyzer):
+        # files an analyzer reads from the output folder itself (e.g. from_disk=True) are its outputs too
+        filenames = list(analyzer.filenames) + list(getattr(analyzer, 'disk_filenames', []))
+        parameters = {k: v for k, v in vars(analyzer).items()
+                      if k not in IGNORED_PARAMETERS and not k.startswith('_')}
+        description = {'simulation': str(simulation.id),
+                       'analyzer': f'{type(analyzer).__module__}.{type(analyzer).__qualname__}',
+                       'parameters': parameters,
+                       'outputs': output_fingerprint(simulation, filenames, self.hash_outputs)}
+        return hashlib.sha1(json.dumps(description, sort_keys=True, default=repr).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def contains(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return False
+        os.utime(path)  # mark as recently used for the LRU eviction
+        return True
+
+    def load(self, key):
+        with open(self._path(key), 'rb') as f:
+            return pickle.load(f)
+
+    def store(self, key, value):
+        tmp_path = self._path(key) + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used results until the cache fits in max_size_mb"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.pkl')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # evicted by another worker
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def record_hit(self, simulation, key):
+        with open(os.path.join(self.cache_dir, 'hits', f'{self.token}_{os.getpid()}.txt'), 'a') as f:
+            f.write(f'{simulation.id}\t{key}\n')
+
+    def pop_hits(self):
+        """Cached results recorded by filter since the last call, as a {simulation id: result} dict"""
+        results = {}
+        for hits_file in glob.glob(os.path.join(self.cache_dir, 'hits', f'{self.token}_*.txt')):
+            with open(hits_file) as f:
+                for line in f:
+                    sim_id, key = line.rstrip('\n').split('\t')
+                    try:
+                        results[sim_id] = self.load(key)
+                    except FileNotFoundError:
+                        print(f'\nWarning: cached result of simulation {sim_id} was evicted, '
+                              f'increase max_size_mb and rerun the analysis')
+            os.remove(hits_file)
+        return results
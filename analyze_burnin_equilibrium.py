@@ -0,0 +1,36 @@
+import os
+from simtools.Analysis.AnalyzeManager import AnalyzeManager
+from simtools.SetupParser import SetupParser
+
+from inset_analyzers import BurninEquilibriumAnalyzer
+
+# This block will be used unless overridden on the command-line
+SetupParser.default_block = 'HPC'
+
+user = os.getlogin()  # user initials
+
+expt_name = f'{user}_FE_2022_burnin_ITN_zone_1_50'
+expt_id = '7e5a7597-f131-ed11-a9fc-b88303911bc1'  ## change expt_id
+working_dir = os.path.join('simulation_outputs')
+output_format = 'csv'  # 'csv', 'parquet' or 'feather'
+
+if __name__ == "__main__":
+    SetupParser.init()
+
+    sweep_variables = ['Run_Number', 'x_Temporary_Larval_Habitat']
+
+    # analyzers to run, Burnin_Equilibrium.csv goes to equilibrium_table in the Burnin scripts
+    analyzers = [
+        BurninEquilibriumAnalyzer(expt_name=expt_name,
+                                  working_dir=working_dir,
+                                  channels=['PfHRP2 Prevalence', 'Daily EIR', 'Adult Vectors'],
+                                  window_years=5,
+                                  tolerance=0.05,
+                                  sweep_variables=sweep_variables),
+    ]
+    # keep each simulation's results on disk, reruns only retrieve new or changed simulations
+    for analyzer in analyzers:
+        analyzer.enable_cache(os.path.join(working_dir, 'analysis_cache'))
+        analyzer.set_output_format(output_format)
+    am = AnalyzeManager(expt_id, analyzers=analyzers)
+    am.analyze()
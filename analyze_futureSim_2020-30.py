@@ -1,9 +1,15 @@
 from simtools.Analysis.AnalyzeManager import AnalyzeManager
 from simtools.SetupParser import SetupParser
 import numpy as np
+import pandas as pd
 import os
 
-from analyzer_collection import *
+from analyzer_base import FusedAnalyzer
+from inset_analyzers import InsetChartAnalyzer
+from summary_analyzers import MonthlyPfPRAnalyzerU5, AnnualAgebinPfPRAnalyzer
+from event_analyzers import ReceivedCampaignAnalyzer
+from table_io import load_table
+from experiment_catalog import ExperimentCatalog
 
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -16,11 +22,14 @@ expt_name = f'{user}_FE_2022_futureSim_zone_3'
 expt_id = '30ed8733-8732-ed11-a9fc-b88303911bc1'  ## change expt_id
 
 working_dir = os.path.join('simulation_outputs')
+output_format = 'csv'  # 'csv', 'parquet' or 'feather'
+use_cache = False  # keep analyzer results in simulation_outputs/analysis_cache, for reruns of the same simulations
+single_report = False  # True for experiments run with single_summary_report = True (one multi-year report)
 
 
 def plot_inset_chart(channels_inset_chart, sweep_variables):
     # read in analyzed InsetChart data
-    df = pd.read_csv(os.path.join(working_dir, expt_name, 'All_Age_InsetChart.csv'))
+    df = load_table(os.path.join(working_dir, expt_name, 'All_Age_InsetChart.csv'))
     df['date'] = pd.to_datetime(df['date'])
     df = df.groupby(['date'] + sweep_variables)[channels_inset_chart].agg(np.mean).reset_index()
 
@@ -45,7 +54,7 @@ def plot_inset_chart(channels_inset_chart, sweep_variables):
 def plot_summary_report(sweep_variables):
     # read in analyzed summary reporrt
     channels_summary_report = ['Pop', 'Cases', 'Severe cases', 'PfPR']
-    df = pd.read_csv(os.path.join(working_dir, expt_name, 'Agebin_PfPR_ClinicalIncidence_annual.csv'))
+    df = load_table(os.path.join(working_dir, expt_name, 'Agebin_PfPR_ClinicalIncidence_annual.csv'))
     df = df.sort_values(by='agebin')
     # take mean over all years in report
     df = df.groupby(['agebin'] + sweep_variables)[channels_summary_report].agg(np.mean).reset_index()
@@ -72,7 +81,7 @@ def plot_summary_report(sweep_variables):
 
 def plot_events(event_list, sweep_variables):
     # read in analyzed event data
-    df = pd.read_csv(os.path.join(working_dir, expt_name, 'Event_Count.csv'))
+    df = load_table(os.path.join(working_dir, expt_name, 'Event_Count.csv'))
     df['date'] = pd.to_datetime(df['date'])
     cov_channel_list = ['%s_Coverage' % x[9:] for x in event_list]
     cov_channel_list = [x for x in cov_channel_list if x in df.columns.values]
@@ -133,6 +142,7 @@ if __name__ == "__main__":
                               working_dir=working_dir,
                               start_year=2021,
                               end_year=2026,
+                              single_report=single_report,
                               sweep_variables=sweep_variables),
         AnnualAgebinPfPRAnalyzer(expt_name=expt_name,
                                  working_dir=working_dir,
@@ -140,8 +150,16 @@ if __name__ == "__main__":
                                  sweep_variables=sweep_variables),
 
     ]
-
-    am = AnalyzeManager(expt_id, analyzers=analyzers)
+    # with use_cache, keep each simulation's results on disk, reruns only retrieve new or changed simulations
+    for analyzer in analyzers:
+        if use_cache:
+            analyzer.enable_cache(os.path.join(working_dir, 'analysis_cache'))
+        analyzer.set_output_format(output_format)
+
+    # one retrieval and parse of each output file for all analyzers
+    # with the simulations of earlier experiments this one reused (see simulation_memo.py)
+    linked_sims = list(ExperimentCatalog().linked_simulations(expt_id)['sim_id'])
+    am = AnalyzeManager(expt_id, sim_list=linked_sims, analyzers=[FusedAnalyzer(analyzers)])
     am.analyze()
 
     sweep_vars_for_plotting = [x for x in sweep_variables if x != 'Run_Number']
@@ -1,7 +1,9 @@
+import os
 from simtools.Analysis.AnalyzeManager import AnalyzeManager
 from simtools.SetupParser import SetupParser
 
-from analyzer_collection import *
+from summary_analyzers import MonthlyPfPRAnalyzerU5
+from experiment_catalog import ExperimentCatalog
 
 # This block will be used unless overridden on the command-line
 SetupParser.default_block = 'HPC'
@@ -11,6 +13,9 @@ user = os.getlogin()  # user initials
 expt_name = f'{user}_FE_2022_Calibration_zone3_50'
 expt_id = 'ab1c1847-1732-ed11-a9fc-b88303911bc1'  ## change expt_id
 working_dir = os.path.join('simulation_outputs')
+output_format = 'csv'  # 'csv', 'parquet' or 'feather'
+use_cache = False  # keep analyzer results in simulation_outputs/analysis_cache, for reruns of the same simulations
+single_report = False  # True for experiments run with single_summary_report = True (one multi-year report)
 
 if __name__ == "__main__":
     SetupParser.init()
@@ -25,7 +30,15 @@ if __name__ == "__main__":
                               working_dir=working_dir,
                               start_year=2010,
                               end_year=2020,
+                              single_report=single_report,
                               sweep_variables=sweep_variables),
     ]
-    am = AnalyzeManager(expt_id, analyzers=analyzers)
+    # with use_cache, keep each simulation's results on disk, reruns only retrieve new or changed simulations
+    for analyzer in analyzers:
+        if use_cache:
+            analyzer.enable_cache(os.path.join(working_dir, 'analysis_cache'))
+        analyzer.set_output_format(output_format)
+    # with the simulations of earlier experiments the pickup reused (see simulation_memo.py)
+    linked_sims = list(ExperimentCatalog().linked_simulations(expt_id)['sim_id'])
+    am = AnalyzeManager(expt_id, sim_list=linked_sims, analyzers=analyzers)
     am.analyze()
@@ -0,0 +1,191 @@
+import os
+import datetime
+import functools
+import numpy as np
+from simtools.Analysis.BaseAnalyzers import BaseAnalyzer
+from analysis_cache import AnalysisCache
+from table_io import TABLE_FORMATS, write_table
+from local_analysis import select_from_outputs
+
+"""
+Calendar axis shared by the time-series analyzers
+"""
+
+
+def monthparser(x):
+    if x == 0:
+        return 12
+    else:
+        return datetime.datetime.strptime(str(x), '%j').month
+
+
+# Month of each simulation day, indexed by Time % 365 (365-day model years)
+DAY_TO_MONTH = np.array([monthparser((day + 1) % 365) for day in range(365)], dtype=np.int64)
+
+
+@functools.lru_cache(maxsize=32)
+def calendar_axis(start_year, duration):
+    """Day, Month, Year and date of every simulation day 0..duration-1, built once per start_year/duration.
+    'date' is the calendar date of the day, 'month_date' the first day of its model month.
+    The arrays are shared through the cache, index them (which copies) instead of modifying them."""
+    time = np.arange(duration, dtype=np.int64)
+    day = time % 365
+    year = time // 365 + start_year
+    month = DAY_TO_MONTH[day]
+    jan_first = (year - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+    month_first = ((year - 1970) * 12 + month - 1).astype('datetime64[M]').astype('datetime64[D]')
+    return {'Day': day,
+            'Month': month,
+            'Year': year,
+            'date': (jan_first + (day - 1)).astype(object),
+            'month_date': month_first.astype(object)}
+
+
+def calendar_lookup(time, start_year, fields=('Day', 'Month', 'Year')):
+    """Look up calendar fields for an array of simulation days by integer indexing into calendar_axis"""
+    time = np.asarray(time, dtype=np.int64)
+    # round the duration up to whole years so all simulations of an experiment share one table
+    duration = 365 * (int(time.max()) // 365 + 1) if len(time) else 0
+    calendar = calendar_axis(start_year, duration)
+    return {field: calendar[field][time] for field in fields}
+
+
+"""
+Analyzer base class with an optional on-disk cache of select_simulation_data results
+"""
+
+
+def _cached_filter(method):
+    @functools.wraps(method)
+    def filter(self, simulation):
+        if self.cache is None or self._caching:
+            return method(self, simulation)
+        self._caching = True
+        try:
+            if not method(self, simulation):
+                return False
+        finally:
+            self._caching = False
+        key = self.cache.key(simulation, self)
+        if self.cache.contains(key):
+            self.cache.record_hit(simulation, key)
+            return False  # no need to retrieve its outputs, the cached result is added back in finalize
+        # kept for select_simulation_data, computing a key looks up the simulation's path (on COMPS) and outputs
+        self._cache_keys[str(simulation.id)] = key
+        return True
+
+    return filter
+
+
+def _cached_select_simulation_data(method):
+    @functools.wraps(method)
+    def select_simulation_data(self, data, simulation):
+        if self.cache is None or self._caching:
+            return method(self, data, simulation)
+        self._caching = True
+        try:
+            simdata = method(self, data, simulation)
+        finally:
+            self._caching = False
+        # a key is computed again if filter ran on another copy of the analyzer (e.g. in another process)
+        key = self._cache_keys.pop(str(simulation.id), None) or self.cache.key(simulation, self)
+        self.cache.store(key, simdata)
+        return simdata
+
+    return select_simulation_data
+
+
+def _cached_finalize(method):
+    @functools.wraps(method)
+    def finalize(self, all_data):
+        if self.cache is None or self._caching:
+            return method(self, all_data)
+        analyzed = {str(getattr(sim, 'id', sim)) for sim in all_data}
+        hits = {sim_id: simdata for sim_id, simdata in self.cache.pop_hits().items() if sim_id not in analyzed}
+        # hits are recorded by parallel workers, order all results by simulation id, with or without hits, so
+        # that a first run and a rerun from the cache write the same outputs
+        all_data = dict(sorted(list(all_data.items()) + list(hits.items()),
+                               key=lambda item: str(getattr(item[0], 'id', item[0]))))
+        self._caching = True
+        try:
+            return method(self, all_data)
+        finally:
+            self._caching = False
+
+    return finalize
+
+
+class CacheableAnalyzer(BaseAnalyzer):
+    cache = None
+    _caching = False
+    output_format = 'csv'
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # wrap the methods each analyzer defines, calls through super() are not cached twice thanks to _caching
+        for name, wrapper in [('filter', _cached_filter),
+                              ('select_simulation_data', _cached_select_simulation_data),
+                              ('finalize', _cached_finalize)]:
+            if name in cls.__dict__:
+                setattr(cls, name, wrapper(cls.__dict__[name]))
+
+    @_cached_filter
+    def filter(self, simulation):
+        return True
+
+    def enable_cache(self, cache_dir, max_size_mb=1024, hash_outputs=False):
+        """Keep select_simulation_data results in cache_dir, keyed by simulation id, analyzer class and parameters
+        and output file size/mtime (plus sha1 with hash_outputs). On reruns simulations with a cached result are
+        filtered out, so their outputs are not retrieved again, and their result is added back in finalize, where
+        results are ordered by simulation id.
+        The least recently used results are evicted once the cache grows over max_size_mb."""
+        self.cache = AnalysisCache(cache_dir, max_size_mb=max_size_mb, hash_outputs=hash_outputs)
+        self._cache_keys = {}
+        return self
+
+    def set_output_format(self, output_format):
+        """Write finalize tables as 'csv', or as zstd compressed 'parquet' or 'feather' files (needs pyarrow) with
+        the sweep variables dictionary-encoded. Downstream scripts read any of them with table_io.load_table."""
+        if output_format not in TABLE_FORMATS:
+            raise ValueError(f'Unknown output format {output_format}, use one of {list(TABLE_FORMATS)}')
+        self.output_format = output_format
+        return self
+
+    def save_table(self, df, filename):
+        return write_table(df, os.path.join(self.working_dir, self.expt_name, filename), self.output_format,
+                           categorical_columns=getattr(self, 'sweep_variables', None))
+
+
+class FusedAnalyzer(BaseAnalyzer):
+    """Runs several analyzers on one retrieval of the union of their files per simulation, each file parsed once
+    and handed to every analyzer reading it (see local_analysis.select_from_outputs), then finalizes each of them.
+    Use it in place of the list of analyzers: AnalyzeManager(expt_id, analyzers=[FusedAnalyzer(analyzers)]).
+    experiments optionally gives, for each analyzer, the id of the only experiment it analyzes (None for all),
+    to analyze several experiments (e.g. one per zone) in one pass, or a list of experiment and simulation ids
+    (e.g. with the simulations linked to the experiment, see simulation_memo.py)."""
+
+    def __init__(self, analyzers, working_dir=".", experiments=None):
+        filenames = list(dict.fromkeys(fname for analyzer in analyzers for fname in analyzer.filenames))
+        super(FusedAnalyzer, self).__init__(working_dir=working_dir, filenames=filenames, parse=False)
+        self.analyzers = analyzers
+        self.experiments = [None if ids is None else {str(key) for key in (ids if isinstance(ids, list) else [ids])}
+                            for ids in experiments or [None] * len(analyzers)]
+
+    def analyzes(self, i, simulation):
+        ids = self.experiments[i]
+        if ids is not None and str(getattr(simulation, 'experiment_id', None)) not in ids \
+                and str(simulation.id) not in ids:
+            return False
+        return self.analyzers[i].filter(simulation)
+
+    def filter(self, simulation):
+        # every analyzer's filter runs, cached analyzers record their hits there
+        return any([self.analyzes(i, simulation) for i in range(len(self.analyzers))])
+
+    def select_simulation_data(self, data, simulation):
+        analyzers = [analyzer if self.analyzes(i, simulation) else None for i, analyzer in enumerate(self.analyzers)]
+        return select_from_outputs(simulation, analyzers, data)
+
+    def finalize(self, all_data):
+        for i, analyzer in enumerate(self.analyzers):
+            analyzer.finalize({sim: results[i][0] for sim, results in all_data.items() if results[i] is not None})
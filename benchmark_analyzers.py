@@ -0,0 +1,118 @@
+import os
+import time
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from analyzer_collection import *
+from synthetic_outputs import write_experiment
+from local_analysis import discover_simulations, read_outputs
+
+"""
+Time select_simulation_data and finalize of every analyzer on synthetic simulation outputs (synthetic_outputs.py).
+Each analyzer runs in a fresh process so its peak RSS is its own.
+"""
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+experiment_dir = os.path.join('simulation_outputs', 'benchmark_experiment')
+working_dir = os.path.join('simulation_outputs', 'benchmark')
+expt_name = 'benchmark'
+start_year = 2020
+years = 10
+num_seeds = 5
+sweep = {'itn_coverage': [0.5, 0.8]}
+event_rows_per_year = 20000
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float('nan')
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss / 1024 ** 2 if maxrss > 1 << 32 else maxrss / 1024
+
+
+def benchmark_analyzer(analyzer, simulations):
+    read_time = select_time = 0
+    size = 0
+    all_data = {}
+    for simulation in simulations:
+        if not analyzer.filter(simulation):
+            continue
+        size += sum(os.path.getsize(os.path.join(simulation.get_path(), fname)) for fname in analyzer.filenames)
+        t0 = time.perf_counter()
+        data = read_outputs(simulation, analyzer.filenames, getattr(analyzer, 'parse', True))
+        t1 = time.perf_counter()
+        all_data[simulation] = analyzer.select_simulation_data(data, simulation)
+        select_time += time.perf_counter() - t1
+        read_time += t1 - t0
+
+    t0 = time.perf_counter()
+    analyzer.finalize(all_data)
+    finalize_time = time.perf_counter() - t0
+
+    total = read_time + select_time
+    return {'analyzer': type(analyzer).__name__,
+            'sims': len(all_data),
+            'read_s': read_time,
+            'select_s': select_time,
+            'finalize_s': finalize_time,
+            'sims_per_s': len(all_data) / total if total else float('nan'),
+            'MB_per_s': size / 1024 ** 2 / total if total else float('nan'),
+            'peak_rss_MB': peak_rss_mb()}
+
+
+def _benchmark_in_process(analyzer, experiment_dir):
+    return benchmark_analyzer(analyzer, discover_simulations(experiment_dir))
+
+
+def default_analyzers(sweep_variables):
+    end_year = start_year + years
+    kwargs = dict(expt_name=expt_name, working_dir=working_dir, sweep_variables=sweep_variables,
+                  start_year=start_year)
+    return [InsetChartAnalyzer(**kwargs),
+            AnnualAgebinPfPRAnalyzer(end_year=end_year, **kwargs),
+            MonthlyAgebinPfPRAnalyzer(end_year=end_year, **kwargs),
+            MonthlyPfPRAnalyzerU5(end_year=end_year, **kwargs),
+            MonthlyPfPRAnalyzerU5(end_year=end_year, single_report=True, **kwargs),
+            MonthlyPfPRAnalyzerU10(end_year=end_year, **kwargs),
+            WeeklyPfPRAnalyzerU5(end_year=end_year, **kwargs),
+            IndividualEventsAnalyzer(**kwargs),
+            TransmissionReport(daily_report=True, monthly_report=True, **kwargs),
+            BednetUsageAnalyzer(**kwargs),
+            ReceivedCampaignAnalyzer(**kwargs),
+            MonthlyTreatedCasesAnalyzer(end_year=end_year, **kwargs),
+            MonthlySevereTreatedByAgeAnalyzer(end_year=end_year, **kwargs),
+            MonthlyAgebinSevereTreatedAnalyzer(end_year=end_year, **kwargs),
+            MonthlyPfPRAnalyzerU5IP(end_year=end_year, **kwargs),
+            MonthlyAgebinPfPRAnalyzerIP(end_year=end_year, **kwargs)]
+
+
+def run_benchmark(analyzers, experiment_dir):
+    """Benchmark each analyzer in its own fresh process, in order (the severe treatment analyzers
+    read the tables written by the PfPR analyzers)"""
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for analyzer in analyzers:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(_benchmark_in_process, analyzer, experiment_dir).result())
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    if not os.path.exists(experiment_dir):
+        write_experiment(experiment_dir, num_seeds=num_seeds, sweep=sweep, start_year=start_year, years=years,
+                         event_rows_per_year=event_rows_per_year)
+    if os.path.exists(os.path.join(working_dir, expt_name)):
+        shutil.rmtree(os.path.join(working_dir, expt_name))
+    os.makedirs(working_dir, exist_ok=True)
+
+    results = run_benchmark(default_analyzers(['Run_Number'] + list(sweep)), experiment_dir)
+    pd.set_option('display.width', 200)
+    print(results.round(3).to_string(index=False))
+    results.to_csv(os.path.join(working_dir, 'benchmark_results.csv'), index=False)
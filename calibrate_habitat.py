@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pandas as pd
+import matplotlib as mpl
+
+mpl.use('Agg')
+import matplotlib.pyplot as plt
+from calibration_helper import simulation_ll, HabitatSurrogate, propose_habitats, allocate_seeds
+from table_io import load_table
+
+"""
+One round of the habitat calibration: score every calibration experiment run so far against the DHS data, fit a
+surrogate of the log-likelihood over x_Temporary_Larval_Habitat and write the habitat sweep of the next round,
+concentrated where the optimum may lie. Set habitat_sweep_file in Burnin__zone_<zone>.py to run it.
+Alternatively seed_sweep_file lists the seeds to add to the current candidates whose likelihood is still
+uncertain enough to compete with the best one (set seed_sweep_file in Burnin__zone_<zone>.py), as long as
+the ranking of the candidates is not stable.
+"""
+
+user = os.getlogin()  # user initials
+zone = 1
+# calibration experiments of every round so far, all of them are used to fit the surrogate
+expt_names = [f'{user}_FE_2022_Calibration_zone{zone}_50']
+output_dir = os.path.join('simulation_outputs')
+data_dir = os.path.join('data')
+sweep_variables = ['x_Temporary_Larval_Habitat', 'Run_Number']
+num_habitats = 7
+habitat_bounds = (0.01, 2)
+habitat_sweep_file = os.path.join(output_dir, f'habitat_sweep_zone_{zone}.csv')
+seed_sweep_file = os.path.join(output_dir, f'seed_sweep_zone_{zone}.csv')
+max_seeds = 10
+
+
+def load_ll(expt_names, data_df):
+    ll_dfs = []
+    for expt_name in expt_names:
+        sim_df = load_table(os.path.join(output_dir, expt_name, 'U5_PfPR_ClinicalIncidence.csv'))
+        sim_df.columns = [col.replace(' U5', '') for col in sim_df.columns]
+        sim_df['npos'] = (sim_df['PfPR'] * sim_df['Pop']).round(0)
+        ll_df = simulation_ll(sim_df, data_df, sweep_variables)
+        ll_df['expt_name'] = expt_name
+        ll_dfs.append(ll_df)
+    return pd.concat(ll_dfs, ignore_index=True)
+
+
+def plot_surrogate(ll_df, surrogate, proposed):
+    habitats = np.logspace(*np.log10(habitat_bounds), 200)
+    mean, sd = surrogate.predict(habitats)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.scatter(ll_df['x_Temporary_Larval_Habitat'], ll_df['ll'], s=10, color='k', alpha=0.5, label='simulations')
+    ax.plot(habitats, mean, color='#FF0000', label='surrogate')
+    ax.fill_between(habitats, mean - 2 * sd, mean + 2 * sd, color='#FF0000', alpha=0.2)
+    for habitat in proposed:
+        ax.axvline(habitat, color='blue', linewidth=0.5)
+    ax.set_xscale('log')
+    ax.set_xlabel('Temporary Larval Habitat Multiplier')
+    ax.set_ylabel('log-likelihood')
+    ax.set_title(f'Zone {zone}, next sweep in blue')
+    ax.legend()
+    fig.savefig(os.path.join(output_dir, f'habitat_surrogate_zone_{zone}.png'))
+
+
+if __name__ == "__main__":
+    dhs_pfpr_df = pd.read_csv(os.path.join(data_dir, f'PfPr_DHS_Ghana_Zone_{zone}.csv'))
+    ll_df = load_ll(expt_names, dhs_pfpr_df)
+    surrogate = HabitatSurrogate(ll_df['x_Temporary_Larval_Habitat'], ll_df['ll'])
+    proposed = propose_habitats(surrogate, n=num_habitats, bounds=habitat_bounds)
+
+    mean, sd = surrogate.predict(proposed)
+    sweep_df = pd.DataFrame({'x_Temporary_Larval_Habitat': proposed, 'll_mean': mean, 'll_sd': sd})
+    print(sweep_df)
+    sweep_df.to_csv(habitat_sweep_file, index=False)
+    plot_surrogate(ll_df, surrogate, proposed)
+
+    seed_df = allocate_seeds(ll_df, max_seeds=max_seeds)
+    seed_df.to_csv(seed_sweep_file, index=False)
+    if seed_df.empty:
+        print('Ranking of the candidate habitats is stable, no seeds to add')
+    else:
+        print(f'{len(seed_df)} seeds to add:')
+        print(seed_df.groupby('x_Temporary_Larval_Habitat').size().reset_index(name='new_seeds'))
@@ -0,0 +1,139 @@
+import os
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from simtools.Analysis.AnalyzeManager import AnalyzeManager
+from simtools.ExperimentManager.ExperimentManagerFactory import ExperimentManagerFactory
+from simtools.SetupParser import SetupParser
+
+from analyzer_base import FusedAnalyzer
+from summary_analyzers import MonthlyPfPRAnalyzerU5
+from calibration_helper import simulation_ll
+from experiment_catalog import ExperimentCatalog
+from table_io import load_table
+
+"""
+Joint calibration of the three Ghana zones: submits the burnin or pickup experiments of every zone as one batch
+(the per-zone Burnin__zone_<zone>.py / pickup10_zone_<zone>.py scripts define them), analyzes the three pickup
+experiments in one AnalyzeManager pass and scores each zone against its own DHS data in parallel. Submitted
+experiments are recorded in the local experiment catalog, tagged with their zone and stage, and the pickups of a
+zone start from its latest recorded burn-in. stage = 'calibrate' runs all of it in one go.
+"""
+
+SetupParser.default_block = 'HPC'
+
+user = os.getlogin()  # user initials
+output_dir = os.path.join('simulation_outputs')
+data_dir = os.path.join('data')
+stage = 'analyze'  # 'burnin' or 'pickup' to submit the experiments, 'analyze' to analyze and score the pickups
+# 'calibrate' submits the burn-ins, then the pickups of those burn-ins, then analyzes and scores them
+output_format = 'csv'  # 'csv', 'parquet' or 'feather'
+use_cache = False  # keep analyzer results in simulation_outputs/analysis_cache, for reruns of the same simulations
+single_report = False  # True for experiments run with single_summary_report = True (one multi-year report)
+sweep_variables = ['x_Temporary_Larval_Habitat', 'Run_Number']
+best_fit_file = os.path.join(output_dir, 'zone_calibration_best_fit.csv')
+
+ZONES = {1: {'name': 'Savannah', 'burnin': 'Burnin__zone_1', 'pickup': 'pickup10_zone_1',
+             'dhs_file': 'PfPr_DHS_Ghana_Zone_1.csv'},
+         2: {'name': 'Forest', 'burnin': 'Burnin__zone_2', 'pickup': 'pickup10_zone_2',
+             'dhs_file': 'PfPr_DHS_Ghana_Zone_2.csv'},
+         3: {'name': 'Coastal', 'burnin': 'Burnin__zone_3', 'pickup': 'pickup10_zone_3',
+             'dhs_file': 'PfPr_DHS_Ghana_Zone_3.csv'}}
+
+
+def submit(stage):
+    """Create the stage's experiment of every zone before waiting on any of them, then record them in the
+    experiment catalog with their zone and stage. Pickups pick up the latest burn-in of their zone in the catalog,
+    as submitted by this script, in place of the burnin_id of their script. Pickups with reuse_simulations are
+    linked to the simulations of earlier experiments they reuse, a zone whose pickup simulations all succeeded
+    before is not submitted again."""
+    burnin_ids = latest_experiments('burnin')['expt_id'] if stage == 'pickup' else None
+    exp_managers = {}
+    for zone, config in ZONES.items():
+        module = importlib.import_module(config[stage])
+        if stage == 'pickup':
+            run_sim_args = module.build_experiment(burnin_id=burnin_ids[zone], reuse=module.reuse_simulations)
+        else:
+            run_sim_args = module.build_experiment()
+        if run_sim_args is None:
+            print(f'Zone {zone}: every {stage} simulation already succeeded, nothing submitted')
+            continue
+        exp_manager = ExperimentManagerFactory.init()
+        exp_manager.run_simulations(**run_sim_args)
+        exp_managers[zone] = exp_manager
+
+    catalog = ExperimentCatalog()
+    for zone, exp_manager in exp_managers.items():
+        exp_manager.wait_for_finished(verbose=True)
+        assert (exp_manager.succeeded())
+        catalog.register(exp_manager.experiment.exp_id, checkpoints=(stage == 'burnin'), zone=zone, stage=stage)
+
+
+def latest_experiments(stage):
+    """Most recently recorded experiment of each zone for the stage, indexed by zone"""
+    experiments = ExperimentCatalog().experiments(stage=stage)
+    if experiments.empty:
+        raise LookupError(f'No {stage} experiments in the experiment catalog, submit them with this script')
+    experiments = experiments.rename(columns={'exp_id': 'expt_id', 'exp_name': 'expt_name'})
+    return experiments.groupby('zone').last()
+
+
+def analyze(experiments):
+    analyzers = [MonthlyPfPRAnalyzerU5(expt_name=row['expt_name'],
+                                       working_dir=output_dir,
+                                       start_year=2010,
+                                       end_year=2020,
+                                       single_report=single_report,
+                                       sweep_variables=sweep_variables)
+                 for zone, row in experiments.iterrows()]
+    # with use_cache, keep each simulation's results on disk, reruns only retrieve new or changed simulations
+    for analyzer in analyzers:
+        if use_cache:
+            analyzer.enable_cache(os.path.join(output_dir, 'analysis_cache'))
+        analyzer.set_output_format(output_format)
+    # simulations of earlier pickups reused by the current ones (see simulation_memo.py)
+    catalog = ExperimentCatalog()
+    linked = [list(catalog.linked_simulations(expt_id)['sim_id']) for expt_id in experiments['expt_id']]
+    am = AnalyzeManager(list(experiments['expt_id']), sim_list=[sim_id for sim_ids in linked for sim_id in sim_ids],
+                        analyzers=[FusedAnalyzer(analyzers, experiments=[[expt_id] + sim_ids for expt_id, sim_ids
+                                                                         in zip(experiments['expt_id'], linked)])])
+    am.analyze()
+
+
+def score_zone(zone, expt_name):
+    """Best fitting habitat multiplier of the zone, with the mean log-likelihood over seeds of each multiplier"""
+    sim_df = load_table(os.path.join(output_dir, expt_name, 'U5_PfPR_ClinicalIncidence.csv'))
+    sim_df.columns = [col.replace(' U5', '') for col in sim_df.columns]
+    sim_df['npos'] = (sim_df['PfPR'] * sim_df['Pop']).round(0)
+    dhs_df = pd.read_csv(os.path.join(data_dir, ZONES[zone]['dhs_file']))
+
+    ll_df = simulation_ll(sim_df, dhs_df, sweep_variables)
+    score_df = ll_df.groupby(sweep_variables[0])['ll'].agg(['mean', 'std', 'count']).reset_index()
+    best = score_df.loc[score_df['mean'].idxmax()]
+    return {'zone': zone, 'name': ZONES[zone]['name'], 'expt_name': expt_name,
+            sweep_variables[0]: best[sweep_variables[0]], 'll': best['mean'], 'll_std': best['std'],
+            'seeds': int(best['count']), 'candidates': len(score_df)}
+
+
+def score_zones(experiments):
+    with ProcessPoolExecutor(max_workers=len(experiments)) as executor:
+        best_fits = list(executor.map(score_zone, experiments.index, experiments['expt_name']))
+    best_fit_df = pd.DataFrame(best_fits)
+    best_fit_df.to_csv(best_fit_file, index=False)
+    return best_fit_df
+
+
+if __name__ == "__main__":
+    SetupParser.init()
+    if stage == 'calibrate':
+        submit('burnin')
+        submit('pickup')
+        experiments = latest_experiments('pickup')
+        analyze(experiments)
+        print(score_zones(experiments))
+    elif stage in ('burnin', 'pickup'):
+        submit(stage)
+    else:
+        experiments = latest_experiments('pickup')
+        analyze(experiments)
+        print(score_zones(experiments))
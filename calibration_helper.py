@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln
+
+"""
+Scoring of simulated PfPR against DHS survey data, vectorized over every simulation of a sweep
+"""
+
+
+def beta_binomial(raw_nobs, sim_nobs, raw_pos, sim_pos):
+    """Beta-binomial log-likelihood of each observation, on arrays of any (broadcastable) shape.
+    calibtool.LL_calculators.beta_binomial returns the mean of these over the observations."""
+    return (gammaln(raw_nobs + 1) + gammaln(raw_pos + sim_pos + 1)
+            + gammaln(raw_nobs - raw_pos + sim_nobs - sim_pos + 1) + gammaln(sim_nobs + 2)
+            - (gammaln(raw_pos + 1) + gammaln(raw_nobs - raw_pos + 1) + gammaln(raw_nobs + sim_nobs + 2)
+               + gammaln(sim_pos + 1) + gammaln(sim_nobs - sim_pos + 1)))
+
+
+def simulation_ll(sim_df, data_df, sweep_variables, merge_on=('year', 'month')):
+    """Mean log-likelihood of the DHS observations (DHS_n, DHS_pos) for each combination of sweep_variables,
+    given the simulated Pop and npos. Every combination is matched against every observation in one merge,
+    observations without simulated data are left out of the mean as in the per-combination merges this replaces."""
+    sweep_variables, merge_on = list(sweep_variables), list(merge_on)
+    combos = sim_df[sweep_variables].drop_duplicates()
+    comb_df = combos.merge(data_df, how='cross').merge(sim_df, on=sweep_variables + merge_on, how='left')
+    comb_df['ll'] = beta_binomial(comb_df['DHS_n'].to_numpy(float), comb_df['Pop'].to_numpy(float),
+                                  comb_df['DHS_pos'].to_numpy(float), comb_df['npos'].to_numpy(float))
+    return comb_df.groupby(sweep_variables)['ll'].mean().reset_index(name='ll')
+
+
+def score(sim_df, data_df, sweep_variables, merge_on=('year', 'month'), score_by=None):
+    """Log-likelihood of each value of score_by (default the first sweep variable, e.g. the habitat multiplier),
+    averaged over the other sweep variables (e.g. Run_Number)"""
+    score_by = score_by or sweep_variables[0]
+    ll_df = simulation_ll(sim_df, data_df, sweep_variables, merge_on)
+    return ll_df.groupby([score_by])['ll'].mean().reset_index(name='ll')
+
+
+class HabitatSurrogate:
+    """Gaussian process regression of the log-likelihood on log10 of the habitat multiplier, with a squared
+    exponential kernel. The seed-to-seed scatter at each habitat sets the noise level and the length scale
+    is the one of length_scales with the highest marginal likelihood."""
+
+    def __init__(self, habitats, ll, length_scales=np.logspace(-1.5, 0.5, 21)):
+        habitats, ll = np.asarray(habitats, float), np.asarray(ll, float)
+        keep = np.isfinite(ll)
+        self.x = np.log10(habitats[keep])
+        self.mean, self.scale = ll[keep].mean(), ll[keep].std() or 1
+        self.y = (ll[keep] - self.mean) / self.scale
+        self.noise = self.noise_variance(self.x, self.y)
+        self.length_scale = max(length_scales, key=self.log_marginal_likelihood)
+        self.chol, self.alpha = self.factorize(self.length_scale)
+
+    @staticmethod
+    def noise_variance(x, y):
+        """Pooled variance between replicates at the same habitat, relative to the total (y is standardized)"""
+        _, groups, counts = np.unique(x, return_inverse=True, return_counts=True)
+        if (counts > 1).sum() == 0:
+            return 1e-2
+        group_means = np.bincount(groups, weights=y) / counts
+        within = ((y - group_means[groups]) ** 2).sum() / max(len(y) - len(counts), 1)
+        return max(within, 1e-6)
+
+    @staticmethod
+    def kernel(x1, x2, length_scale):
+        return np.exp(-0.5 * np.subtract.outer(x1, x2) ** 2 / length_scale ** 2)
+
+    def factorize(self, length_scale):
+        K = self.kernel(self.x, self.x, length_scale) + self.noise * np.eye(len(self.x))
+        chol = np.linalg.cholesky(K)
+        alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, self.y))
+        return chol, alpha
+
+    def log_marginal_likelihood(self, length_scale):
+        chol, alpha = self.factorize(length_scale)
+        return -0.5 * self.y @ alpha - np.log(np.diag(chol)).sum()
+
+    def predict(self, habitats):
+        """Mean and standard deviation of the expected log-likelihood at each habitat"""
+        k = self.kernel(np.log10(np.asarray(habitats, float)), self.x, self.length_scale)
+        v = np.linalg.solve(self.chol, k.T)
+        sd = np.sqrt(np.clip(1 - (v ** 2).sum(axis=0), 0, None))
+        return k @ self.alpha * self.scale + self.mean, sd * self.scale
+
+
+def propose_habitats(surrogate, n=7, kappa=2, bounds=None, grid_size=500):
+    """n habitat multipliers, log-spaced over the range where the surrogate's upper bound (mean + kappa * sd) still
+    reaches the best lower bound, i.e. where the optimum may lie. bounds default to the range simulated so far."""
+    lo, hi = np.log10(bounds) if bounds is not None else (surrogate.x.min(), surrogate.x.max())
+    grid = np.logspace(lo, hi, grid_size)
+    mean, sd = surrogate.predict(grid)
+    plausible = grid[mean + kappa * sd >= (mean - kappa * sd).max()]
+    return np.logspace(np.log10(plausible.min()), np.log10(plausible.max()), n)
+
+
+def read_habitat_sweep(path):
+    """Habitat multipliers proposed for the next calibration round (see calibrate_habitat.py)"""
+    return pd.read_csv(path)['x_Temporary_Larval_Habitat'].tolist()
+
+
+def allocate_seeds(ll_df, variable='x_Temporary_Larval_Habitat', new_seeds=2, max_seeds=10, z=1.96):
+    """Next round of a sequential seed allocation over the candidates of ll_df (one log-likelihood per variable
+    value and Run_Number, see simulation_ll). Candidates whose confidence interval on the mean log-likelihood
+    overlaps the best one's, the best included, get up to new_seeds more Run_Numbers, max_seeds at most.
+    Returns the variable and Run_Number of the simulations to add, empty once the ranking is stable: no other
+    candidate overlaps the best, or all those that do have max_seeds."""
+    stats = ll_df.dropna(subset=['ll']).groupby(variable).agg(mean=('ll', 'mean'), std=('ll', 'std'),
+                                                              seeds=('ll', 'count'), last_seed=('Run_Number', 'max'))
+    half_width = z * stats['std'].fillna(np.inf) / np.sqrt(stats['seeds'])
+    best = stats['mean'].idxmax()
+    overlapping = stats['mean'] + half_width >= stats.loc[best, 'mean'] - half_width[best]
+    if overlapping.sum() <= 1:
+        return pd.DataFrame(columns=[variable, 'Run_Number'])
+
+    rows = [(value, run_number)
+            for value, row in stats[overlapping & (stats['seeds'] < max_seeds)].iterrows()
+            for run_number in range(int(row['last_seed']) + 1,
+                                    int(row['last_seed']) + 1 + min(new_seeds, max_seeds - int(row['seeds'])))]
+    return pd.DataFrame(rows, columns=[variable, 'Run_Number'])
+
+
+def read_seed_sweep(path):
+    """(habitat multiplier, Run_Number) pairs to simulate next, as written by calibrate_habitat.py"""
+    df = pd.read_csv(path)
+    return list(zip(df['x_Temporary_Larval_Habitat'], df['Run_Number'].astype(int)))
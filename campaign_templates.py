@@ -0,0 +1,183 @@
+import copy
+import json
+import functools
+import numpy as np
+
+"""
+Campaign events of an intervention built once per sweep. An intervention function (e.g. itn_intervention, which
+calls add_ITN_age_season for every deployment year) is called on a copy of the config builder, and the events and
+config parameters it adds are kept as plain json. Each simulation then gets those events with only its swept
+arguments (e.g. coverage_level) and start day patched in, the rest of the events is shared between simulations.
+"""
+
+# values given to the swept arguments to find where they end up in the events, see CampaignTemplate.swept_paths
+SENTINELS = (0.1234567, 0.7654321)
+
+
+def campaign_json_default(obj):
+    if hasattr(obj, 'to_dict'):  # dtk-tools campaign classes
+        return obj.to_dict()
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, '__dict__'):
+        return vars(obj)
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+
+
+def encode_json(content, sort_keys=False):
+    """Compact json of a config or campaign. Without indentation json uses its C encoder, several times faster
+    than the indented dumps, and numpy values or campaign objects are written as plain json."""
+    return json.dumps(content, separators=(',', ':'), sort_keys=sort_keys, check_circular=False,
+                      default=campaign_json_default)
+
+
+def plain(content):
+    """content as plain json types (dicts, lists, numbers and strings)"""
+    return json.loads(encode_json(content))
+
+
+def campaign_events(cb):
+    campaign = cb.campaign
+    return campaign.Events if hasattr(campaign, 'Events') else campaign['Events']
+
+
+def builder_rest(cb):
+    """json of what a config builder holds besides its config parameters and campaign events (custom reports,
+    demographics overlays, ...), None if some of it cannot be written as json"""
+    campaign = cb.campaign
+    rest = {name: value for name, value in vars(cb).items() if name not in ('config', 'campaign')}
+    rest['config'] = {name: value for name, value in cb.config.items() if name != 'parameters'}
+    rest['campaign'] = {name: value for name, value in (vars(campaign) if hasattr(campaign, 'Events') else campaign)
+                        .items() if name != 'Events'}
+    try:
+        return encode_json(rest, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+
+def _leaves(content, path=()):
+    if isinstance(content, dict):
+        for key, value in content.items():
+            yield from _leaves(value, path + (key,))
+    elif isinstance(content, list):
+        for i, value in enumerate(content):
+            yield from _leaves(value, path + (i,))
+    else:
+        yield path, content
+
+
+def _patch(content, trie, values, start_shift):
+    """content with the leaves of trie replaced, copying only the dicts and lists on the way to them"""
+    if isinstance(trie, tuple):
+        kind, value = trie
+        return values[value] if kind == 'swept' else value + start_shift
+    content = copy.copy(content)
+    for key, subtrie in trie.items():
+        content[key] = _patch(content[key], subtrie, values, start_shift)
+    return content
+
+
+class CampaignTemplate:
+    """Intervention function of a sweep, as called by ModFn, whose events are built once.
+
+    CampaignTemplate(cb, itn_intervention, 'coverage_level') calls itn_intervention on copies of cb and records
+    where coverage_level ends up in the events, config parameters and tags it adds. A template is then called as
+    the function would be (e.g. ModFn(itn, coverage_level=0.6)), with start_shift days added to the Start_Day of
+    every event if given. Swept arguments have to be used as they are (not e.g. scaled by age group), and the
+    function may only add campaign events and set config parameters, else a ValueError is raised. Items it appends
+    to a list parameter (e.g. Listed_Events) are merged into the list when the template is called, rather than
+    replacing what other functions added to it since. Calling a
+    template with an argument that is not swept raises a TypeError, give fixed arguments when building it.
+
+    The events are built with two values of each swept argument, plus 0. Events added or left out depending on the
+    value of a swept argument, e.g. under `if coverage_level > 0.5:`, are only detected when the values built with
+    fall on both sides of the condition (0 catches `if coverage_level > 0:`). Call such functions with ModFn directly.
+    """
+
+    def __init__(self, cb, add_fn, *swept, **kwargs):
+        functools.update_wrapper(self, add_fn)
+        self.add_fn = add_fn
+        self.swept = list(swept)
+        self.kwargs = kwargs
+
+        sentinels = {name: SENTINELS[0] + i * 1e-4 for i, name in enumerate(self.swept)}
+        self.template = self.build(cb, sentinels)
+        self.trie = {}
+        for name in self.swept:
+            for path in self.swept_paths(cb, sentinels, name):
+                self.add_leaf(path, ('swept', name))
+        for i, event in enumerate(self.template['events']):
+            if 'Start_Day' in event and 'Start_Day' not in self.trie.get('events', {}).get(i, {}):
+                self.add_leaf(('events', i, 'Start_Day'), ('start', event['Start_Day']))
+
+    def build(self, cb, values):
+        """Events, changed config parameters, items appended to list parameters and tags add_fn adds to a copy of
+        cb, as plain json"""
+        cb = copy.deepcopy(cb)
+        nevents = len(campaign_events(cb))
+        before, rest = plain(cb.config['parameters']), builder_rest(cb)
+        tags = self.add_fn(cb, **self.kwargs, **values)
+        if rest != builder_rest(cb):
+            raise ValueError(f'{self.__name__} changes more of the config builder than its config parameters and '
+                             f'campaign events (e.g. reports or input files), call it with ModFn directly')
+        config, appended = {}, {}
+        for name, value in plain(cb.config['parameters']).items():
+            if name in before and before[name] == value:
+                continue
+            old = before.get(name)
+            if isinstance(value, list) and isinstance(old, list) and value[:len(old)] == old:
+                appended[name] = value[len(old):]
+            else:
+                config[name] = value
+        return plain({'events': list(campaign_events(cb))[nevents:], 'config': config, 'appended': appended,
+                      'tags': tags or {}})
+
+    def swept_paths(self, cb, sentinels, name):
+        """Paths of the leaves of the template that are the swept argument name"""
+        variant = self.build(cb, dict(sentinels, **{name: SENTINELS[1]}))
+        zero = self.build(cb, dict(sentinels, **{name: 0}))
+        template_leaves, variant_leaves = list(_leaves(self.template)), list(_leaves(variant))
+        template_paths = [path for path, _ in template_leaves]
+        for leaves in (variant_leaves, _leaves(zero)):
+            if template_paths != [path for path, _ in leaves]:
+                raise ValueError(f'The events of {self.__name__} depend on {name}, call it with ModFn directly')
+        paths = []
+        for (path, value), (_, variant_value) in zip(template_leaves, variant_leaves):
+            if value == variant_value:
+                continue
+            if value != sentinels[name] or variant_value != SENTINELS[1]:
+                raise ValueError(f'{self.__name__} does not use {name} as it is ({path}), '
+                                 f'call it with ModFn directly')
+            paths.append(path)
+        return paths
+
+    def add_leaf(self, path, leaf):
+        node = self.trie
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = leaf
+
+    def __call__(self, cb, start_shift=None, **swept):
+        unexpected = [name for name in swept if name not in self.swept]
+        if unexpected:
+            raise TypeError(f'{self.__name__} template got arguments {unexpected} it does not sweep '
+                            f'(swept: {self.swept})')
+        missing = [name for name in self.swept if name not in swept]
+        if missing:
+            raise TypeError(f'{self.__name__} template missing swept arguments {missing}')
+        patched = _patch(self.template, self.trie, swept, start_shift or 0)
+        if patched['config']:
+            cb.update_params(patched['config'])
+        for name, items in patched['appended'].items():
+            current = list(cb.config['parameters'].get(name) or [])
+            cb.update_params({name: current + [item for item in items if item not in current]})
+        for event in patched['events']:
+            cb.add_event(event)
+        tags = dict(patched['tags'])
+        if start_shift is not None:
+            tags[f'{self.__name__}_start_shift'] = start_shift
+        return tags
@@ -0,0 +1,48 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+"""
+Detection of the quasi-equilibrium of burn-in simulations, to serialize them as early as transmission has settled
+"""
+
+
+def annual_means(values, days_per_year=365):
+    """Mean of each complete year of a daily channel, which averages out the seasonal cycle"""
+    values = np.asarray(values, dtype=float)
+    nyears = len(values) // days_per_year
+    return values[:nyears * days_per_year].reshape(nyears, days_per_year).mean(axis=1)
+
+
+def window_drift(annual, window_years=5):
+    """Relative drift of each window_years rolling window of annual means: the change over the window
+    of a linear fit, relative to the window mean"""
+    windows = sliding_window_view(annual, window_years)
+    x = np.arange(window_years) - (window_years - 1) / 2
+    slope = (windows - windows.mean(axis=1, keepdims=True)) @ x / (x ** 2).sum()
+    scale = np.abs(windows.mean(axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(scale > 0, np.abs(slope) * window_years / scale, np.where(slope == 0, 0, np.inf))
+
+
+def equilibrium_year(values, window_years=5, tolerance=0.05, days_per_year=365):
+    """Years of simulation after which a daily channel is at quasi-equilibrium: the end of the first rolling window
+    from which every window drifts by less than tolerance (relative to its mean). nan if the last window still
+    drifts or the simulation is shorter than window_years."""
+    annual = annual_means(values, days_per_year)
+    if len(annual) < window_years:
+        return np.nan
+    unsettled = np.flatnonzero(window_drift(annual, window_years) >= tolerance)
+    if len(unsettled) == 0:
+        return window_years
+    first_settled = unsettled[-1] + 1
+    if first_settled + window_years > len(annual):
+        return np.nan
+    return first_settled + window_years
+
+
+def recommended_serialize_years(equilibrium_df, step=5, quantile=1.0):
+    """serialize_years by which the quantile (default all) of the simulations and channels of equilibrium_df
+    (see BurninEquilibriumAnalyzer) are at equilibrium, rounded up to a multiple of step. Channels that never
+    settled count as the whole analyzed burn-in (duration_years)."""
+    years = equilibrium_df['equilibrium_year'].fillna(equilibrium_df['duration_years'])
+    return int(min(np.ceil(years.quantile(quantile) / step) * step, equilibrium_df['duration_years'].max()))
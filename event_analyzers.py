@@ -0,0 +1,687 @@
+import os
+import pandas as pd
+import numpy as np
+from report_readers import read_channels, read_event_recorder
+from table_io import load_table
+from analyzer_base import CacheableAnalyzer, calendar_lookup
+
+"""
+ReportEventRecorder ANALYZER
+"""
+
+RECORDER_FILE = 'output/ReportEventRecorder.csv'
+
+
+def recorder_filenames(from_disk):
+    """Files AnalyzeManager retrieves for a ReportEventRecorder analyzer. It holds each retrieved file in memory
+    whole, so with from_disk=True (simulations run locally, or COMPS outputs on a mounted share) nothing is
+    retrieved and the report is read in chunks from the simulation's output folder instead."""
+    return [] if from_disk else [RECORDER_FILE]
+
+
+def recorder_source(data, simulation, from_disk):
+    return os.path.join(simulation.get_path(), RECORDER_FILE) if from_disk else data[RECORDER_FILE]
+
+
+class IndividualEventsAnalyzer(CacheableAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020,
+                 selected_year=None, filter_exists=False, from_disk=False):
+        super(IndividualEventsAnalyzer, self).__init__(working_dir=working_dir,
+                                                       filenames=recorder_filenames(from_disk),
+                                                       parse=False)
+        self.from_disk = from_disk
+        self.disk_filenames = [RECORDER_FILE] if from_disk else []
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.expt_name = expt_name
+        self.start_year = start_year
+        self.selected_year = selected_year
+        self.filter_exists = filter_exists  # flag used for NUCLUSTER
+
+    def filter(self, simulation):
+        if self.filter_exists:
+            file = os.path.join(simulation.get_path(), RECORDER_FILE)
+            return os.path.exists(file)
+        else:
+            return True
+
+    def select_simulation_data(self, data, simulation):
+
+        # only the days of the selected year are kept while reading
+        time_range = None
+        if self.selected_year is not None:
+            first_day = (self.selected_year - self.start_year) * 365
+            time_range = (first_day, first_day + 365)
+        simdata = read_event_recorder(recorder_source(data, simulation, self.from_disk), time_range=time_range)
+        calendar = calendar_lookup(simdata['Time'], self.start_year)
+        simdata['Day'] = calendar['Day']
+        simdata['Month'] = calendar['Month']
+        simdata['Year'] = calendar['Year']
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                try:
+                    simdata[sweep_var] = simulation.tags[sweep_var]
+                except:
+                    simdata[sweep_var] = '-'.join([str(x) for x in simulation.tags[sweep_var]])
+            elif sweep_var == 'Run_Number':
+                simdata[sweep_var] = 0
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("\nWarning: No data have been returned... Exiting...")
+            return
+
+        if self.selected_year is not None:
+            selected_year_suffix = f'_{self.selected_year}'
+        else:
+            selected_year_suffix = '_all_years'
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        print(f'\nSaving outputs to: {os.path.join(self.working_dir, self.expt_name)}')
+
+        adf = pd.concat(selected).reset_index(drop=True)
+        self.save_table(adf, f'IndividualEvents{selected_year_suffix}.csv')
+
+
+class SeedAccumulator:
+    """Running per-day sums and counts (and with variance=True the Welford sum of squared deviations) of channel
+    arrays over the seeds of each sweep combination. Simulations are added one at a time, so memory follows
+    combinations x days and not simulations x days."""
+
+    def __init__(self, channels, variance=False):
+        self.channels = channels
+        self.variance = variance
+        self.groups = {}
+
+    def add(self, key, time, values):
+        values = np.asarray(values, dtype=float)
+        ndays = int(time.max()) + 1 if len(time) else 0
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {name: np.zeros((0, len(self.channels)))
+                                        for name in ['sum', 'count'] + (['m2'] if self.variance else [])}
+        if ndays > len(group['sum']):  # simulations can cover different days
+            for name in group:
+                group[name] = np.pad(group[name], ((0, ndays - len(group[name])), (0, 0)))
+
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0)
+        if self.variance:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                old_mean = group['sum'][time] / group['count'][time]
+        group['sum'][time] += values
+        group['count'][time] += present
+        if self.variance:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                new_mean = group['sum'][time] / group['count'][time]
+            group['m2'][time] += np.where(present, (values - np.nan_to_num(old_mean)) * (values - new_mean), 0)
+
+    def to_frame(self, key_columns):
+        """One row per combination and day seen, with the seed mean of each channel (and its sample variance
+        as '<channel> variance'), ordered by Time then combination"""
+        frames = []
+        for key, group in self.groups.items():
+            seen = group['count'].any(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                df = pd.DataFrame(group['sum'][seen] / group['count'][seen], columns=self.channels)
+                if self.variance:
+                    count = group['count'][seen]
+                    variance = np.where(count > 1, group['m2'][seen] / (count - 1), np.nan)
+                    for c, channel in enumerate(self.channels):
+                        df[f'{channel} variance'] = variance[:, c]
+            df.insert(0, 'Time', np.flatnonzero(seen))
+            for i, col in enumerate(key_columns):
+                df.insert(1 + i, col, key[i])
+            frames.append(df)
+        return pd.concat(frames).sort_values(['Time'] + key_columns, kind='stable').reset_index(drop=True)
+
+
+class TransmissionReport(CacheableAnalyzer):
+
+    def __init__(self, expt_name, channels=None, sweep_variables=None, working_dir='./', start_year=2020,
+                 selected_year=None, daily_report=False, monthly_report=False, filter_exists=False,
+                 seed_variance=False):
+        super(TransmissionReport, self).__init__(working_dir=working_dir,
+                                                 filenames=["output/ReportMalariaFiltered.json"],
+                                                 parse=False)
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.channels = channels or ['Daily Bites per Human', 'Daily EIR', 'Mean Parasitemia', 'PfHRP2 Prevalence',
+                                     'Rainfall']
+        self.start_year = start_year
+        self.selected_year = selected_year
+        self.daily_report = daily_report
+        self.monthly_report = monthly_report
+        self.expt_name = expt_name
+        self.filter_exists = filter_exists
+        self.seed_variance = seed_variance  # adds the variance over Run_Number of each channel to the daily report
+
+    def filter(self, simulation):
+        if self.filter_exists:
+            file = os.path.join(simulation.get_path(), self.filenames[0])
+            return os.path.exists(file)
+        else:
+            return True
+
+    def select_simulation_data(self, data, simulation):
+        channels = read_channels(data[self.filenames[0]], self.channels)
+        values = np.column_stack([channels[channel] for channel in self.channels])
+        time = np.arange(len(values))
+        if self.selected_year is not None:
+            first_day = (self.selected_year - self.start_year) * 365
+            time = time[first_day:first_day + 365]
+            values = values[first_day:first_day + 365]
+
+        sweep = {}
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                value = simulation.tags[sweep_var]
+                sweep[sweep_var] = '-'.join([str(x) for x in value]) if isinstance(value, (list, tuple)) else value
+        # compact per simulation result, seeds are averaged in finalize
+        return {'sweep': sweep, 'Time': time, 'values': values}
+
+    def finalize(self, all_data):
+
+        if len(all_data) == 0:
+            print("\nWarning: No data have been returned... Exiting...")
+            return
+
+        ## Aggregate Run_Number
+        grp_channels = [x for x in self.sweep_variables if x != "Run_Number"]
+        accumulator = SeedAccumulator(self.channels, variance=self.seed_variance)
+        for simdata in all_data.values():
+            accumulator.add(tuple(simdata['sweep'].get(x) for x in grp_channels), simdata['Time'], simdata['values'])
+        adf = accumulator.to_frame(grp_channels)
+        calendar = calendar_lookup(adf['Time'], self.start_year, fields=('Day', 'Month', 'Year', 'month_date'))
+        adf.insert(1, 'date', calendar['month_date'])
+        adf.insert(2, 'Day', calendar['Day'])
+        adf.insert(3, 'Month', calendar['Month'])
+        adf.insert(4, 'Year', calendar['Year'])
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+        print(f'\nSaving outputs to: {os.path.join(self.working_dir, self.expt_name)}')
+
+        if self.selected_year is not None:
+            selected_year_suffix = f'_{self.selected_year}'
+        else:
+            selected_year_suffix = '_all_years'
+
+        sum_channels = ['Daily Bites per Human', 'Daily EIR', 'Rainfall']
+        mean_channels = ['Mean Parasitemia', 'PfHRP2 Prevalence']
+        ### DAILY TRANSMISSION
+        if self.daily_report:
+            self.save_table(adf, f'daily_transmission_report{selected_year_suffix}.csv')
+
+        ### MONTHLY TRANSMISSION
+        if self.monthly_report:
+            df = adf.groupby(['date', 'Year', 'Month'] + grp_channels)[sum_channels].agg(np.sum).reset_index()
+            pdf = adf.groupby(['date', 'Year', 'Month'] + grp_channels)[mean_channels].agg(np.mean).reset_index()
+            mdf = pd.merge(left=pdf, right=df, on=['date', 'Year', 'Month'] + grp_channels)
+            mdf = mdf.rename(columns={'Daily Bites per Human': 'Monthly Bites per Human', 'Daily EIR': 'Monthly EIR'})
+            self.save_table(mdf, f'monthly_transmission_report{selected_year_suffix}.csv')
+
+        ### ANNUAL TRANSMISSION
+        df = adf.groupby(['Year'] + grp_channels)[sum_channels].agg(np.sum).reset_index()
+        pdf = adf.groupby(['Year'] + grp_channels)[mean_channels].agg(np.mean).reset_index()
+        adf = pd.merge(left=pdf, right=df, on=['Year'] + grp_channels)
+        adf = adf.rename(columns={'Daily Bites per Human': 'Annual Bites per Human', 'Daily EIR': 'Annual EIR'})
+        self.save_table(adf, f'annual_transmission_report{selected_year_suffix}.csv')
+
+
+class BednetUsageAnalyzer(CacheableAnalyzer):
+
+    def __init__(self, expt_name, channels=None, sweep_variables=None, working_dir='./', start_year=2020,
+                 selected_year=None, filter_exists=False):
+        super(BednetUsageAnalyzer, self).__init__(working_dir=working_dir,
+                                                  filenames=["output/ReportEventCounter.json",
+                                                             "output/ReportMalariaFiltered.json"],
+                                                  parse=False)
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.channels = channels or ['Bednet_Using', 'Bednet_Got_New_One']
+        self.inset_channels = ['Statistical Population']
+        self.start_year = start_year
+        self.selected_year = selected_year
+        self.expt_name = expt_name
+        self.filter_exists = filter_exists
+
+    def filter(self, simulation):
+        if self.filter_exists:
+            file = os.path.join(simulation.get_path(), self.filenames[0])
+            return os.path.exists(file)
+        else:
+            return True
+
+    def select_simulation_data(self, data, simulation):
+
+        simdata = pd.DataFrame(read_channels(data[self.filenames[1]], self.inset_channels))
+        simdata['Time'] = simdata.index
+
+        if self.channels:
+            d = pd.DataFrame(read_channels(data[self.filenames[0]], self.channels))
+            d['Time'] = d.index
+            simdata = pd.merge(left=simdata, right=d, on='Time')
+
+        calendar = calendar_lookup(simdata['Time'], self.start_year)
+        simdata['Day'] = calendar['Day']
+        simdata['Month'] = calendar['Month']
+        simdata['Year'] = calendar['Year']
+
+        if self.selected_year is not None:
+            simdata = simdata.loc[(simdata['Year'] == self.selected_year)]
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                try:
+                    simdata[sweep_var] = simulation.tags[sweep_var]
+                except:
+                    simdata[sweep_var] = '-'.join([str(x) for x in simulation.tags[sweep_var]])
+            elif sweep_var == 'Run_Number':
+                simdata[sweep_var] = 0
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("\nWarning: No data have been returned... Exiting...")
+            return
+
+        adf = pd.concat(selected).reset_index(drop=True)
+        adf['date'] = calendar_lookup(adf['Time'], self.start_year, fields=('month_date',))['month_date']
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+        print(f'\nSaving outputs to: {os.path.join(self.working_dir, self.expt_name)}')
+
+        ## Aggregate time to months
+        sum_channels = ['Bednet_Got_New_One']
+        for x in [y for y in sum_channels if y not in adf.columns.values]:
+            adf[x] = 0
+        mean_channels = ['Statistical Population', 'Bednet_Using']
+        df = adf.groupby(['date'] + self.sweep_variables)[sum_channels].agg(np.sum).reset_index()
+        pdf = adf.groupby(['date'] + self.sweep_variables)[mean_channels].agg(np.mean).reset_index()
+
+        adf = pd.merge(left=pdf, right=df, on=['date'] + self.sweep_variables)
+        adf['mean_usage'] = adf['Bednet_Using'] / adf['Statistical Population']
+        adf['new_net_coverage'] = adf['Bednet_Got_New_One'] / adf['Statistical Population']
+        self.save_table(adf, 'BednetUsageAnalyzer.csv')
+
+
+class ReceivedCampaignAnalyzer(CacheableAnalyzer):
+
+    def __init__(self, expt_name, channels=None, sweep_variables=None, working_dir='./', start_year=2020):
+        super(ReceivedCampaignAnalyzer, self).__init__(working_dir=working_dir,
+                                                       filenames=["output/ReportEventCounter.json",
+                                                                  "output/InsetChart.json"],
+                                                       parse=False)
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.channels = channels or ['Received_Treatment']
+        self.start_year = start_year
+        self.expt_name = expt_name
+
+
+    def select_simulation_data(self, data, simulation):
+
+        simdata = pd.DataFrame(read_channels(data[self.filenames[0]], self.channels))
+        simdata['Population'] = read_channels(data[self.filenames[1]], ['Statistical Population'])[
+            'Statistical Population']
+        simdata['Time'] = simdata.index
+        calendar = calendar_lookup(simdata['Time'], 2022, fields=('Day', 'Year', 'date'))
+        simdata['Day'] = calendar['Day']
+        simdata['Year'] = calendar['Year']
+        simdata['date'] = calendar['date']
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                try:
+                    simdata[sweep_var] = simulation.tags[sweep_var]
+                except:
+                    simdata[sweep_var] = '-'.join([str(x) for x in simulation.tags[sweep_var]])
+            elif sweep_var == 'Run_Number':
+                simdata[sweep_var] = 0
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("\nWarning: No data have been returned... Exiting...")
+            return
+
+        adf = pd.concat(selected).reset_index(drop=True)
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+        print(f'\nSaving outputs to: {os.path.join(self.working_dir, self.expt_name)}')
+
+        events = [ch.replace('Received_', '') for ch in self.channels if 'Received' in ch]
+        for event in events:
+            adf[f'{event}_Coverage'] = adf[f'Received_{event}'] / adf['Population']
+        self.save_table(adf, 'Event_Count.csv')
+
+
+"""
+ReportEventCounter Analyzer
+"""
+
+
+# MonthlyTreatedCasesAnalyzer
+class MonthlyTreatedCasesAnalyzer(CacheableAnalyzer):
+
+    def __init__(self, expt_name, channels=None, sweep_variables=None, working_dir=".", start_year=2020,
+                 end_year=2020, filter_exists=False):
+        super(MonthlyTreatedCasesAnalyzer, self).__init__(working_dir=working_dir,
+                                                          filenames=["output/ReportEventCounter.json",
+                                                                     "output/ReportMalariaFiltered.json"],
+                                                          parse=False)
+        self.sweep_variables = sweep_variables or ["LGA", "Run_Number"]
+        self.channels = channels or ['Received_Treatment']
+        self.inset_channels = ['Statistical Population', 'New Infections', 'Newly Symptomatic', 'New Clinical Cases',
+                               'New Severe Cases', 'PfHRP2 Prevalence']
+        self.expt_name = expt_name
+        self.start_year = start_year
+        self.end_year = end_year
+        self.filter_exists = filter_exists
+
+    def filter(self, simulation):
+        if self.filter_exists:
+            file = os.path.join(simulation.get_path(), self.filenames[0])
+            return os.path.exists(file)
+        else:
+            return True
+
+    def select_simulation_data(self, data, simulation):
+        simdata = pd.DataFrame(read_channels(data[self.filenames[1]], self.inset_channels))
+        simdata['Time'] = simdata.index
+        if self.channels:
+            d = pd.DataFrame(read_channels(data[self.filenames[0]], self.channels))
+            d['Time'] = d.index
+            simdata = pd.merge(left=simdata, right=d, on='Time')
+        calendar = calendar_lookup(simdata['Time'], self.start_year, fields=('Day', 'Month', 'Year', 'month_date'))
+        simdata['Day'] = calendar['Day']
+        simdata['Month'] = calendar['Month']
+        simdata['Year'] = calendar['Year']
+        if self.start_year > 0:
+            simdata['date'] = calendar['month_date']
+        else:
+            simdata['date'] = simdata["Year"].astype(str) + '-' + simdata["Month"].astype(str) + '-' + simdata[
+                "Day"].astype(str)
+
+        sum_channels = self.channels + ['New Clinical Cases',
+                                        'New Severe Cases']  # 'New Infections', 'Newly Symptomatic',
+        mean_channels = ['Statistical Population', 'PfHRP2 Prevalence']
+        for x in [y for y in sum_channels if y not in simdata.columns.values]:
+            simdata[x] = 0
+
+        df = simdata.groupby(['date'])[sum_channels].agg(np.sum).reset_index()
+        pdf = simdata.groupby(['date'])[mean_channels].agg(np.mean).reset_index()
+
+        simdata = pd.merge(left=pdf, right=df, on=['date'])
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                try:
+                    simdata[sweep_var] = simulation.tags[sweep_var]
+                except:
+                    simdata[sweep_var] = '-'.join([str(x) for x in simulation.tags[sweep_var]])
+            elif sweep_var == 'Run_Number':
+                simdata[sweep_var] = 0
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("No data have been returned... Exiting...")
+            return
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        print(f'\nSaving outputs to: {os.path.join(self.working_dir, self.expt_name)}')
+
+        adf = pd.concat(selected).reset_index(drop=True)
+        self.save_table(adf, 'All_Age_Monthly_Cases.csv')
+
+
+def reconcile_severe_treatment(df, treated_col, severe_col, group_cols, start_year):
+    """Fix treated severe cases in excess of the modeled severe cases, group-wise without a row loop.
+    A month with at least one excess treatment moves the excess to the previous month of the same simulation
+    (the first simulated month, having no previous month, is set to the modeled count), then any remaining
+    excess above 0.5 is clipped to the modeled count. Returns the corrected treated column aligned to df."""
+    df = df.sort_values(group_cols + ['year', 'month'], kind='stable')
+    treated = df[treated_col]
+    severe = df[severe_col]
+    excess = treated - severe
+    first_month = (df['year'] == start_year) & (df['month'] == 1)
+
+    moved = excess.where((excess >= 1) & ~first_month, 0)
+    received = moved.groupby([df[col] for col in group_cols], sort=False).shift(-1).fillna(0)
+    treated = (treated - moved + received).where(~(first_month & (excess >= 1)), severe)
+    treated = treated.where(treated - severe <= 0.5, severe)
+    return treated.sort_index()
+
+
+# MonthlySevereTreatedByAgeAnalyzer
+class MonthlySevereTreatedByAgeAnalyzer(CacheableAnalyzer):
+    def __init__(self, expt_name, event_name='Received_Severe_Treatment', agebins=None,
+                 sweep_variables=None, working_dir=".", start_year=2020, end_year=2030, from_disk=False):
+        super(MonthlySevereTreatedByAgeAnalyzer, self).__init__(working_dir=working_dir,
+                                                                filenames=recorder_filenames(from_disk),
+                                                                parse=False)
+        self.from_disk = from_disk
+        self.disk_filenames = [RECORDER_FILE] if from_disk else []
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.event_name = event_name
+        self.agebins = agebins or [1, 5, 200]
+        self.expt_name = expt_name
+        self.start_year = start_year
+        self.end_year = end_year
+
+    def select_simulation_data(self, data, simulation):
+
+        output_data = read_event_recorder(recorder_source(data, simulation, self.from_disk), events=[self.event_name],
+                                          usecols=['Time', 'Event_Name', 'Age'])
+
+        simdata = pd.DataFrame()
+        if len(output_data) > 0:  # there are events of this type
+            calendar = calendar_lookup(output_data['Time'], self.start_year)
+            output_data['Day'] = calendar['Day']
+            output_data['month'] = calendar['Month']
+            output_data['year'] = calendar['Year']
+            output_data['age in years'] = output_data['Age'] / 365
+
+            for agemax in self.agebins:
+                if agemax < 200:
+                    agelabel = 'U%d' % agemax
+                else:
+                    agelabel = 'all_ages'
+                if agemax == 5:
+                    agemin = 0.25
+                else:
+                    agemin = 0
+                d = output_data[(output_data['age in years'] < agemax) & (output_data['age in years'] > agemin)]
+                g = d.groupby(['year', 'month'])['Event_Name'].agg(len).reset_index()
+                g = g.rename(columns={'Event_Name': 'Num_%s_Received_Severe_Treatment' % agelabel})
+                if simdata.empty:
+                    simdata = g
+                else:
+                    if not g.empty:
+                        simdata = pd.merge(left=simdata, right=g, on=['year', 'month'], how='outer')
+                        simdata = simdata.fillna(0)
+
+            for sweep_var in self.sweep_variables:
+                if sweep_var in simulation.tags.keys():
+                    simdata[sweep_var] = simulation.tags[sweep_var]
+                elif sweep_var == 'Run_Number':
+                    simdata[sweep_var] = 0
+        else:
+            simdata = pd.DataFrame(columns=['year', 'month', 'Num_U5_Received_Severe_Treatment',
+                                            'Num_U1_Received_Severe_Treatment',
+                                            'Num_all_ages_Received_Severe_Treatment'] + self.sweep_variables)
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("No data have been returned... Exiting...")
+            return
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        adf = pd.concat(selected, sort=False).reset_index(drop=True)
+        adf = adf.fillna(0)
+        self.save_table(adf, 'Treated_Severe_Monthly_Cases_By_Age.csv')
+
+        for agelabel in ['U5']:
+            severe_treat_df = adf[
+                ['year', 'month', 'Num_%s_Received_Severe_Treatment' % agelabel] + self.sweep_variables]
+            # cast to int65 data type for merge with incidence df
+            severe_treat_df = severe_treat_df.astype({'month': 'int64', 'year': 'int64', 'Run_Number': 'int64'})
+
+            # combine with existing columns of the U5 clinical incidence and PfPR dataframe
+            incidence_df = load_table(
+                os.path.join(self.working_dir, self.expt_name, '%s_PfPR_ClinicalIncidence.csv' % agelabel))
+            merged_df = pd.merge(left=incidence_df, right=severe_treat_df,
+                                 on=self.sweep_variables + ['year', 'month'],
+                                 how='left')
+            merged_df = merged_df.fillna(0)
+
+            # fix any excess treated cases!
+            merged_df['num severe cases %s' % agelabel] = merged_df['Severe cases %s' % agelabel] * merged_df[
+                'Pop %s' % agelabel] * 30 / 365
+            merged_df['sweep_id'] = merged_df.groupby(self.sweep_variables, sort=False).ngroup().apply(
+                '{:010}'.format)
+            merged_df['Num_%s_Received_Severe_Treatment' % agelabel] = reconcile_severe_treatment(
+                merged_df, 'Num_%s_Received_Severe_Treatment' % agelabel, 'num severe cases %s' % agelabel,
+                group_cols=['Run_Number', 'sweep_id'], start_year=self.start_year)
+
+            del merged_df['num severe cases %s' % agelabel]
+            self.save_table(merged_df, '%s_PfPR_ClinicalIncidence_severeTreatment.csv' % agelabel)
+
+
+# MonthlyAgebinSevereTreatedAnalyzer
+class MonthlyAgebinSevereTreatedAnalyzer(CacheableAnalyzer):
+    def __init__(self, expt_name, event_name='Received_Severe_Treatment', agebins=None,
+                 sweep_variables=None, IP_variable=None, working_dir=".", start_year=2020, end_year=2030,
+                 filter_exists=False, from_disk=False):
+        super(MonthlyAgebinSevereTreatedAnalyzer, self).__init__(working_dir=working_dir,
+                                                                 filenames=recorder_filenames(from_disk),
+                                                                 parse=False)
+        self.from_disk = from_disk
+        self.disk_filenames = [RECORDER_FILE] if from_disk else []
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.IP_variable = IP_variable
+        self.event_name = event_name
+        self.agebins = agebins or [2, 5, 10, 20, 100]
+        self.expt_name = expt_name
+        self.start_year = start_year
+        self.end_year = end_year
+        self.filter_exists = filter_exists
+
+    def filter(self, simulation):
+        if self.filter_exists:
+            file = os.path.join(simulation.get_path(), RECORDER_FILE)
+            return os.path.exists(file)
+        else:
+            return True
+
+    def select_simulation_data(self, data, simulation):
+
+        output_data = read_event_recorder(recorder_source(data, simulation, self.from_disk), events=[self.event_name],
+                                          usecols=list(filter(None, ['Time', 'Event_Name', 'Age', self.IP_variable])))
+
+        simdata = pd.DataFrame()
+        if len(output_data) > 0:  # there are events of this type
+            calendar = calendar_lookup(output_data['Time'], self.start_year)
+            output_data['Day'] = calendar['Day']
+            output_data['month'] = calendar['Month']
+            output_data['year'] = calendar['Year']
+            output_data['age in years'] = output_data['Age'] / 365
+
+            for i, agemax in enumerate(self.agebins):
+                if i == 0:
+                    agemin = 0
+                else:
+                    agemin = self.agebins[i - 1]
+
+                d = output_data[(output_data['age in years'].between(agemin, agemax))]
+                g = d.groupby(list(filter(None, ['year', 'month'] + [self.IP_variable])))['Event_Name'].agg(
+                    len).reset_index()
+                g = g.rename(columns={'Event_Name': 'Num_Received_Severe_Treatment'})
+                if simdata.empty:
+                    simdata = g
+                    simdata['agebin'] = agemax
+                else:
+                    if not g.empty:
+                        g['agebin'] = agemax
+                        simdata = pd.concat([g, simdata])
+                        simdata = simdata.fillna(0)
+
+            for sweep_var in self.sweep_variables:
+                if sweep_var in simulation.tags.keys():
+                    try:
+                        simdata[sweep_var] = simulation.tags[sweep_var]
+                    except:
+                        simdata[sweep_var] = '-'.join([str(x) for x in simulation.tags[sweep_var]])
+                elif sweep_var == 'Run_Number':
+                    simdata[sweep_var] = 0
+        else:
+            simdata = pd.DataFrame(
+                columns=list(filter(None, ['year', 'month', 'agebin', 'Num_Received_Severe_Treatment'] +
+                                    self.sweep_variables + [self.IP_variable])))
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("No data have been returned... Exiting...")
+            return
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        adf = pd.concat(selected, sort=False).reset_index(drop=True)
+        adf = adf.fillna(0)
+
+        # Does not support IPfilter, currently also not needed
+        incidence_file = os.path.join(self.working_dir, self.expt_name, 'Agebin_PfPR_ClinicalIncidence.csv')
+        try:
+            incidence_df = load_table(incidence_file)
+        except FileNotFoundError:
+            print(f"\nWarning: {incidence_file} not found, run MonthlyAgebinPfPRAnalyzer first... Exiting...")
+            return
+
+        severe_treat_df = adf[['year', 'month', 'agebin', 'Num_Received_Severe_Treatment'] + self.sweep_variables]
+        # cast to int65 data type for merge with incidence df
+        severe_treat_df = severe_treat_df.astype({'month': 'int64', 'year': 'int64', 'Run_Number': 'int64'})
+
+        # combine all age bins with the existing columns of the clinical incidence and PfPR dataframe at once,
+        # rows stay grouped by agebin in the order of self.agebins
+        incidence_df = incidence_df[incidence_df['agebin'].isin(self.agebins)]
+        agebin_order = {agebin: i for i, agebin in enumerate(self.agebins)}
+        incidence_df = incidence_df.sort_values('agebin', key=lambda x: x.map(agebin_order), kind='stable')
+        merged_df = pd.merge(left=incidence_df, right=severe_treat_df,
+                             on=self.sweep_variables + ['year', 'month', 'agebin'],
+                             how='left')
+        merged_df = merged_df.fillna(0)
+
+        # fix any excess treated cases!
+        merged_df['num severe cases'] = merged_df['Severe cases'] * merged_df['Pop'] * 30 / 365
+        merged_df['sweep_id'] = merged_df.groupby(self.sweep_variables, sort=False).ngroup().apply(
+            '{:010}'.format)
+        merged_df['Num_Received_Severe_Treatment'] = reconcile_severe_treatment(
+            merged_df, 'Num_Received_Severe_Treatment', 'num severe cases',
+            group_cols=['Run_Number', 'sweep_id', 'agebin'], start_year=self.start_year)
+
+        del merged_df['num severe cases']
+        self.save_table(merged_df, 'Agebin_PfPR_ClinicalIncidence_severeTreatment.csv')
@@ -0,0 +1,241 @@
+import os
+import json
+import sqlite3
+import datetime
+import pandas as pd
+
+"""
+Local SQLite catalog of experiments and their simulations: ids, tags, output paths and the checkpoints written by
+burn-ins. An experiment is retrieved from COMPS once, when first registered, after which pickup scripts look up
+their burn-in simulations (e.g. by zone, habitat or serialize year) without a round trip per simulation.
+Simulations of earlier experiments can be linked to an experiment (see simulation_memo.py), they are then listed
+with its simulations. Links are deferred while the experiment is built, and attached to it when it is registered
+after submission.
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (exp_id TEXT PRIMARY KEY, exp_name TEXT, added TEXT);
+CREATE TABLE IF NOT EXISTS experiment_tags (exp_id TEXT, name TEXT, value, PRIMARY KEY (exp_id, name));
+CREATE TABLE IF NOT EXISTS simulations (sim_id TEXT PRIMARY KEY, exp_id TEXT, path TEXT, checkpoints TEXT,
+                                        status TEXT);
+CREATE TABLE IF NOT EXISTS tags (sim_id TEXT, name TEXT, value, PRIMARY KEY (sim_id, name));
+CREATE INDEX IF NOT EXISTS simulations_exp_id ON simulations (exp_id);
+CREATE TABLE IF NOT EXISTS linked_simulations (exp_id TEXT, sim_id TEXT, PRIMARY KEY (exp_id, sim_id));
+CREATE TABLE IF NOT EXISTS deferred_links (exp_name TEXT, sim_id TEXT, deferred TEXT);
+CREATE INDEX IF NOT EXISTS deferred_links_exp_name ON deferred_links (exp_name, deferred);
+CREATE INDEX IF NOT EXISTS tags_name_value ON tags (name, value);
+"""
+
+
+def tag_value(value):
+    """Tag values as stored by SQLite: numbers and strings as they are, anything else as json"""
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return json.dumps(value)
+
+
+def list_checkpoints(sim_path):
+    """Days of the state-<day>.dtk checkpoints in a simulation's output folder, None if it cannot be listed"""
+    from simulation_helper import burnin_checkpoints
+    try:
+        return burnin_checkpoints(sim_path)
+    except OSError:
+        return None
+
+
+def burnin_simulations(burnin_id, register=True):
+    """ser_df of the pickup scripts: the burn-in's simulations with their tags, outpath and checkpoints.
+    A burn-in missing from the catalog is retrieved from COMPS, or with register=False raises a LookupError."""
+    catalog = ExperimentCatalog()
+    if str(burnin_id) not in catalog and not register:
+        raise LookupError(f'Burn-in {burnin_id} is not in the experiment catalog yet, build the pickup once '
+                          f'(or register it with ExperimentCatalog().register) to look it up offline')
+    return catalog.simulations(burnin_id, checkpoints=True)
+
+
+class ExperimentCatalog:
+
+    def __init__(self, path=os.path.join('simulation_outputs', 'experiment_catalog.sqlite')):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        # catalogs written before simulations had a status
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(simulations)')]
+        if 'status' not in columns:
+            self.connection.execute('ALTER TABLE simulations ADD COLUMN status TEXT')
+        # catalogs written when links were kept by experiment name, which any later build of that name replaced
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(linked_simulations)')]
+        if 'exp_name' in columns:
+            with self.connection:
+                self.connection.execute('DROP TABLE linked_simulations')
+            self.connection.executescript(SCHEMA)
+        # catalogs written when a build replaced the links deferred by earlier builds of its experiment name
+        table = self.connection.execute("SELECT sql FROM sqlite_master WHERE name = 'deferred_links'").fetchone()[0]
+        if 'PRIMARY KEY' in table:
+            with self.connection:
+                self.connection.execute('ALTER TABLE deferred_links RENAME TO deferred_links_replaced')
+            self.connection.executescript(SCHEMA)
+            with self.connection:
+                self.connection.execute('INSERT INTO deferred_links SELECT * FROM deferred_links_replaced')
+                self.connection.execute('DROP TABLE deferred_links_replaced')
+
+    def __contains__(self, exp_id):
+        return self.connection.execute('SELECT 1 FROM experiments WHERE exp_id = ?', (str(exp_id),)).fetchone() \
+               is not None
+
+    def add_experiment(self, experiment, checkpoints=False, **experiment_tags):
+        """Record an experiment (as given by retrieve_experiment) with its simulations, their tags and paths, and
+        with checkpoints=True the burn-in checkpoints found in each simulation's output folder.
+        experiment_tags (e.g. zone=1, stage='burnin') describe the whole experiment. The links deferred by the latest
+        build of its name before it was created (see defer_links) are attached to it."""
+        exp_id = str(experiment.exp_id)
+        simulations = [(str(sim.id), sim.tags or {}, sim.get_path(), getattr(sim, 'status', None))
+                       for sim in experiment.simulations]
+        created = getattr(experiment, 'date_created', None)
+        with self.connection:
+            build = self.connection.execute(
+                'SELECT MAX(deferred) FROM deferred_links WHERE exp_name = ? AND deferred <= ?',
+                (experiment.exp_name, created.isoformat() if hasattr(created, 'isoformat') else '9999')).fetchone()[0]
+            if build is not None:
+                # that build's links, those of earlier builds are of no use any more, later ones may be submitted
+                self.connection.executemany('INSERT OR IGNORE INTO linked_simulations VALUES (?, ?)',
+                                            [(exp_id, row[0]) for row in self.connection.execute(
+                                                'SELECT sim_id FROM deferred_links WHERE exp_name = ? AND '
+                                                'deferred = ? AND sim_id IS NOT NULL ORDER BY rowid',
+                                                (experiment.exp_name, build))])
+                self.connection.execute('DELETE FROM deferred_links WHERE exp_name = ? AND deferred <= ?',
+                                        (experiment.exp_name, build))
+            self.connection.execute('INSERT OR REPLACE INTO experiments VALUES (?, ?, ?)',
+                                    (exp_id, experiment.exp_name, datetime.datetime.now().isoformat()))
+            self.connection.execute('DELETE FROM experiment_tags WHERE exp_id = ?', (exp_id,))
+            self.connection.executemany('INSERT INTO experiment_tags VALUES (?, ?, ?)',
+                                        [(exp_id, name, tag_value(value)) for name, value in experiment_tags.items()])
+            for sim_id, tags, path, status in simulations:
+                sim_checkpoints = list_checkpoints(path) if checkpoints else None
+                self.connection.execute('INSERT OR REPLACE INTO simulations '
+                                        '(sim_id, exp_id, path, checkpoints, status) VALUES (?, ?, ?, ?, ?)',
+                                        (sim_id, exp_id, path,
+                                         json.dumps(sim_checkpoints) if sim_checkpoints is not None else None,
+                                         getattr(status, 'name', status)))
+                self.connection.execute('DELETE FROM tags WHERE sim_id = ?', (sim_id,))
+                self.connection.executemany('INSERT INTO tags VALUES (?, ?, ?)',
+                                            [(sim_id, name, tag_value(value)) for name, value in tags.items()])
+        return exp_id
+
+    def register(self, exp_id, checkpoints=False, **experiment_tags):
+        """Retrieve an experiment from COMPS (or the local simtools database) and record it"""
+        from simtools.SetupParser import SetupParser
+        from simtools.Utilities.Experiments import retrieve_experiment
+        if not SetupParser.initialized:
+            SetupParser.init()
+        return self.add_experiment(retrieve_experiment(exp_id), checkpoints=checkpoints, **experiment_tags)
+
+    def register_latest(self, exp_name):
+        """Register the latest experiment named exp_name in the local simtools database, e.g. submitted with
+        `dtk run`, unless it is recorded already with all its simulations done. Its exp_id, None if there is none."""
+        from simtools.DataAccess.DataStore import DataStore
+        experiment = DataStore.get_most_recent_experiment(exp_name)
+        if experiment is None or experiment.exp_name != exp_name:
+            return None
+        exp_id = str(experiment.exp_id)
+        running = self.connection.execute("SELECT 1 FROM simulations WHERE exp_id = ? AND "
+                                          "(status IS NULL OR status NOT IN ('Succeeded', 'Failed', 'Canceled'))",
+                                          (exp_id,)).fetchone()
+        if exp_id not in self or running is not None:
+            self.register(exp_id)
+        return exp_id
+
+    def experiments(self, **experiment_tags):
+        """Recorded experiments with the given experiment tags, oldest first, one column per experiment tag"""
+        query = 'SELECT exp_id, exp_name, added FROM experiments'
+        conditions, params = self.tag_conditions('experiment_tags', 'exp_id', experiment_tags)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        df = pd.read_sql_query(query + ' ORDER BY added, rowid', self.connection, params=params)
+        tags = self.read_tags('SELECT exp_id, name, value FROM experiment_tags')
+        return self.with_tags(df, tags, 'exp_id')
+
+    def simulations(self, exp_id=None, register=True, checkpoints=False, **tags):
+        """Simulations of an experiment and those linked to it (of every recorded experiment with exp_id None),
+        with the given tags, as the ser_df of the pickup scripts: one column per tag, plus sim_id, exp_id, outpath
+        and checkpoints.
+        An experiment not recorded yet is registered first, unless register=False."""
+        if exp_id is not None and str(exp_id) not in self and register:
+            self.register(exp_id, checkpoints=checkpoints)
+
+        conditions, params = self.tag_conditions('tags', 'sim_id', tags)
+        if exp_id is not None:
+            conditions.insert(0, '(exp_id = ? OR sim_id IN (SELECT sim_id FROM linked_simulations WHERE exp_id = ?))')
+            params[:0] = [str(exp_id), str(exp_id)]
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        df = pd.read_sql_query(f'SELECT sim_id, exp_id, path AS outpath, checkpoints FROM simulations{where} '
+                               f'ORDER BY rowid', self.connection, params=params)
+        df['checkpoints'] = [json.loads(value) if isinstance(value, str) else None for value in df['checkpoints']]
+
+        # the tags of the same simulations, selected with the same conditions rather than one parameter per
+        # simulation, which would run into SQLite's limit on bound parameters for large sweeps
+        sim_tags = self.read_tags(f'SELECT sim_id, name, value FROM tags WHERE sim_id IN '
+                                  f'(SELECT sim_id FROM simulations{where})', params)
+        return self.with_tags(df, sim_tags, 'sim_id')
+
+    def succeeded_simulation(self, name, value):
+        """id of a succeeded simulation with the tag name=value, None if there is none"""
+        row = self.connection.execute("SELECT sim_id FROM simulations WHERE status = 'Succeeded' AND sim_id IN "
+                                      "(SELECT sim_id FROM tags WHERE name = ? AND value = ?) ORDER BY rowid LIMIT 1",
+                                      (name, tag_value(value))).fetchone()
+        return row[0] if row else None
+
+    def defer_links(self, exp_name, sim_ids):
+        """Simulations of earlier experiments a build of the experiment exp_name reuses, linked to the experiment
+        once registered. Every build is kept: an experiment gets the links of the latest build before it was created,
+        so that building it again (e.g. with list_sweep.py) before it is registered, or without submitting it,
+        leaves the links of submitted experiments as they are."""
+        deferred = datetime.datetime.now().isoformat()
+        with self.connection:
+            # a build reusing no simulation is recorded as well, with a NULL sim_id
+            self.connection.executemany('INSERT INTO deferred_links VALUES (?, ?, ?)',
+                                        [(exp_name, str(sim_id), deferred) for sim_id in sim_ids] or
+                                        [(exp_name, None, deferred)])
+
+    def link_simulations(self, exp_id, sim_ids):
+        """Simulations of earlier experiments listed with those of experiment exp_id"""
+        with self.connection:
+            self.connection.executemany('INSERT OR IGNORE INTO linked_simulations VALUES (?, ?)',
+                                        [(str(exp_id), str(sim_id)) for sim_id in sim_ids])
+
+    def linked_simulations(self, exp_id, register=True):
+        """Simulations linked to experiment exp_id (sim_id and the exp_id of the experiment they ran in), e.g. for
+        the sim_list of AnalyzeManager. An experiment not recorded yet (e.g. submitted with `dtk run`) is
+        registered first, which attaches its deferred links, unless register=False."""
+        if str(exp_id) not in self and register:
+            self.register(exp_id)
+        return pd.read_sql_query('SELECT l.sim_id, s.exp_id FROM linked_simulations l '
+                                 'LEFT JOIN simulations s ON s.sim_id = l.sim_id WHERE l.exp_id = ? ORDER BY l.rowid',
+                                 self.connection, params=[str(exp_id)])
+
+    def read_tags(self, query, params=()):
+        # as objects, so that integer tags (e.g. Run_Number) do not turn into floats next to float ones
+        rows = self.connection.execute(query, params).fetchall()
+        return pd.DataFrame(rows, columns=['key', 'name', 'value'], dtype=object)
+
+    @staticmethod
+    def tag_conditions(table, key, tags):
+        conditions, params = [], []
+        for name, value in tags.items():
+            conditions.append(f'{key} IN (SELECT {key} FROM {table} WHERE name = ? AND value = ?)')
+            params += [name, tag_value(value)]
+        return conditions, params
+
+    @staticmethod
+    def with_tags(df, tags, key):
+        """df with one column per tag name, tags given in long format (key, name, value) and matched on df[key]"""
+        if tags.empty:
+            return df
+        wide = tags.pivot(index='key', columns='name', values='value').infer_objects()
+        wide.columns.name = None
+        return wide.reindex(df[key]).reset_index(drop=True).join(df)
+
+    def close(self):
+        self.connection.close()
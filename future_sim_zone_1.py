@@ -11,9 +11,11 @@ from simtools.ModBuilder import ModBuilder, ModFn
 # Import custom reporters
 from malaria.reports.MalariaReport import add_summary_report, add_filtered_report
 from malaria.reports.MalariaReport import add_event_counter_report
-from simtools.Utilities.Experiments import retrieve_experiment
+from experiment_catalog import ExperimentCatalog, burnin_simulations
+from simulation_memo import memoize_sweep
+from campaign_templates import CampaignTemplate
+from simulation_helper import pickup_checkpoint_files, lazy_run_sim_args, add_monthly_summary_report
 from dtk.interventions.outbreakindividual import recurring_outbreak
-import pandas as pd
 from malaria.interventions.health_seeking import add_health_seeking
 from dtk.interventions.itn import add_ITN
 
@@ -26,43 +28,48 @@ pull_year = 50
 years = 10
 #expt_name = f'{user}_FE_2022_burnin_ITN_zone_1_{serialize_years}'
 burnin_id = '94f245f1-e22e-ed11-a9fc-b88303911bc1'
+# when submitted with this script or calibrate_zones.py, link succeeded simulations of identical earlier experiments
+# instead of rerunning them (`dtk run` and list_sweep.py build the experiment without looking them up)
+reuse_simulations = True
+# one multi-year Monthly_U5 summary report in place of one per year (analyze with single_report = True). Its months
+# are 365 / 12 days aligned to the years, those of the per-year reports are 30 days, so outputs differ between the two
+single_summary_report = False
 serialize_year = 50
 
-SetupParser.init()
-cb = DTKConfigBuilder.from_defaults('MALARIA_SIM', Simulation_Duration=pickup_years * 365)
-
-expt = retrieve_experiment(burnin_id)  # Identifies the desired burn-in experiment
-# Loop through unique "tags" to distinguish between burn-in scenarios (ex. varied historical coverage levels)
-ser_df = pd.DataFrame([x.tags for x in expt.simulations])
-ser_df["outpath"] = pd.Series([sim.get_path() for sim in expt.simulations])
-ser_df = ser_df.iloc[[0]]
-cb.update_params({
-    'Demographics_Filenames': [os.path.join('Ghana', 'Ghana_2.5arcmin_demographics.json')],
-    "Air_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
-    "Land_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
-    "Rainfall_Filename": os.path.join('Ghana', 'Ghana_30arcsec_rainfall_daily.bin'),
-    "Relative_Humidity_Filename": os.path.join('Ghana', 'Ghana_30arcsec_relative_humidity_daily.bin'),
-    "Age_Initialization_Distribution_Type": 'DISTRIBUTION_COMPLEX',
-    "Birth_Rate_Dependence": "FIXED_BIRTH_RATE",
-    'x_Base_Population': 1,
-    'x_Birth': 1,
-    'x_Temporary_Larval_Habitat': 0.1898
-
-})
-
-cb.update_params({
-    'Serialized_Population_Reading_Type': 'READ',
-    'Serialized_Population_Filenames': ['state-%05d.dtk' % (serialize_year * 365)],
-    'Enable_Random_Generator_From_Serialized_Population': 0,
-    'Serialization_Mask_Node_Read': 0,
-    'Enable_Default_Reporting': 1
-})
-
-set_species(cb, ["arabiensis", "funestus", "gambiae"])
-set_larval_habitat(cb, {"arabiensis": {'TEMPORARY_RAINFALL': 7.5e9, 'CONSTANT': 1e7},
-                        "funestus": {'WATER_VEGETATION': 4e8},
-                        "gambiae": {'TEMPORARY_RAINFALL': 8.3e8, 'CONSTANT': 1e7}
-                        })
+
+def build_config():
+    """Config of the pickup, built by build_experiment"""
+    cb = DTKConfigBuilder.from_defaults('MALARIA_SIM', Simulation_Duration=pickup_years * 365)
+
+    cb.update_params({
+        'Demographics_Filenames': [os.path.join('Ghana', 'Ghana_2.5arcmin_demographics.json')],
+        "Air_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
+        "Land_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
+        "Rainfall_Filename": os.path.join('Ghana', 'Ghana_30arcsec_rainfall_daily.bin'),
+        "Relative_Humidity_Filename": os.path.join('Ghana', 'Ghana_30arcsec_relative_humidity_daily.bin'),
+        "Age_Initialization_Distribution_Type": 'DISTRIBUTION_COMPLEX',
+        "Birth_Rate_Dependence": "FIXED_BIRTH_RATE",
+        'x_Base_Population': 1,
+        'x_Birth': 1,
+        'x_Temporary_Larval_Habitat': 0.1898
+
+    })
+
+    cb.update_params({
+        'Serialized_Population_Reading_Type': 'READ',
+        'Serialized_Population_Filenames': ['state-%05d.dtk' % (serialize_year * 365)],
+        'Enable_Random_Generator_From_Serialized_Population': 0,
+        'Serialization_Mask_Node_Read': 0,
+        'Enable_Default_Reporting': 1
+    })
+
+    set_species(cb, ["arabiensis", "funestus", "gambiae"])
+    set_larval_habitat(cb, {"arabiensis": {'TEMPORARY_RAINFALL': 7.5e9, 'CONSTANT': 1e7},
+                            "funestus": {'WATER_VEGETATION': 4e8},
+                            "gambiae": {'TEMPORARY_RAINFALL': 8.3e8, 'CONSTANT': 1e7}
+                            })
+    return cb
+
 
 # Add case management including two interventions
 event_list = []  # Collect events to track in reports
@@ -174,73 +181,129 @@ def irs_intervention(cb, coverage_level):
 event_list = event_list + ['Received_IRS']
 
 """CUSTOM REPORTS"""
-add_filtered_report(cb, start=0, end=pickup_years * 365)
-# Summary report per agebin
-add_summary_report(cb, start=0, interval=365,
-                   age_bins=[0.25, 5],
-                   description='U5_PfPR')
-
-add_summary_report(cb, start=1, interval=365,
-                   age_bins=[0.25, 5, 10, 15, 50, 100, 125],
-                   description='Annual_Agebin')
-
-for year in range(pickup_years):
-    start_day = 0 + 365 * year
-    sim_year = sim_start_year + year
-    add_summary_report(cb, start=1, interval=30,
+
+
+def add_reports(cb):
+    """Reports of the pickup, added by build_experiment"""
+    add_filtered_report(cb, start=0, end=pickup_years * 365)
+    # Summary report per agebin
+    add_summary_report(cb, start=0, interval=365,
                        age_bins=[0.25, 5],
-                       description=f'Monthly_U5_{sim_year}')
-
-# Enable reporters
-cb.update_params({
-    "Report_Event_Recorder": 1,
-    "Report_Event_Recorder_Individual_Properties": [],
-    "Report_Event_Recorder_Ignore_Events_In_List": 0,
-    "Report_Event_Recorder_Events": event_list,
-    'Custom_Individual_Events': event_list
-})
-# Event_counter_report
-add_event_counter_report(cb, event_trigger_list=event_list, start=1, duration=10000)
-recurring_outbreak(cb, start_day=180, repetitions=pickup_years)
-# recurring_outbreak(cb,
-#                    outbreak_fraction=0.05,
-#                    start_day=0,
-#                    repetitions=10,
-#                    tsteps_btwn=365
-#                    )
+                       description='U5_PfPR')
+
+    add_summary_report(cb, start=1, interval=365,
+                       age_bins=[0.25, 5, 10, 15, 50, 100, 125],
+                       description='Annual_Agebin')
+
+    if single_summary_report:
+        # one report over all the years, read with the analyzers' single_report=True
+        add_monthly_summary_report(cb, pickup_years, age_bins=[0.25, 5], description='Monthly_U5')
+    else:
+        for year in range(pickup_years):
+            sim_year = sim_start_year + year
+            add_summary_report(cb, start=1, interval=30,
+                               age_bins=[0.25, 5],
+                               description=f'Monthly_U5_{sim_year}')
+
+    # Enable reporters
+    cb.update_params({
+        "Report_Event_Recorder": 1,
+        "Report_Event_Recorder_Individual_Properties": [],
+        "Report_Event_Recorder_Ignore_Events_In_List": 0,
+        "Report_Event_Recorder_Events": event_list,
+        'Custom_Individual_Events': event_list
+    })
+    # Event_counter_report
+    add_event_counter_report(cb, event_trigger_list=event_list, start=1, duration=10000)
+    recurring_outbreak(cb, start_day=180, repetitions=pickup_years)
+    # recurring_outbreak(cb,
+    #                    outbreak_fraction=0.05,
+    #                    start_day=0,
+    #                    repetitions=10,
+    #                    tsteps_btwn=365
+    #                    )
+
+
 # run_sim_args is what the `dtk run` command will look for
 user = os.getlogin()  # user initials
 expt_name = f'{user}_FE_2022_futureSim_zone_1'
 
 
 """BUILDER"""
-builder = ModBuilder.from_list([[ModFn(case_management),  # cm_cov_U5, cm_cov_adults),
-                                 ModFn(itn_intervention, coverage_level=itn_cov),
-                                 ModFn(irs_intervention, coverage_level=irs_cov),
-                                 ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Path',
-                                       os.path.join(row['outpath'], 'output')),
-                                 #ModFn(DTKConfigBuilder.set_param, 'Run_Number', seed),
-                                 # ModFn(DTKConfigBuilder.set_param, 'Scenario', 'Basic'),  # optional
-                                 # ModFn(DTKConfigBuilder.set_param, 'x_Temporary_Larval_Habitat',
-                                 #      row['x_Temporary_Larval_Habitat']),
-
-                                 ]
-                                for itn_cov in [0.56, 0.8, 0.9]
-                                for irs_cov in [0.0, 0.17, 0.8]
-                                #for seed in range(numseeds)
-                                for r, row in ser_df.iterrows()
-                                ])
-
-run_sim_args = {
-    'exp_name': expt_name,
-    'config_builder': cb,
-    'exp_builder': builder
-}
+
+
+def sweep(ser_df=None):
+    """Coverages of each simulation and the burn-in simulation it picks up from. The burn-in is looked up in the
+    local experiment catalog only, build_experiment retrieves it from COMPS if it is not there yet."""
+    if ser_df is None:
+        ser_df = burnin_simulations(burnin_id, register=False)
+    ser_df = ser_df.iloc[[0]]
+    return [{'itn_coverage': itn_cov,
+             'irs_coverage': irs_cov,
+             'Serialized_Population_Path': os.path.join(row['outpath'], 'output'),
+             # latest checkpoint of the burn-in simulation at or before serialize_year
+             'Serialized_Population_Filenames': pickup_checkpoint_files(serialize_year, row['checkpoints'])}
+            for itn_cov in [0.56, 0.8, 0.9]
+            for irs_cov in [0.0, 0.17, 0.8]
+            for r, row in ser_df.iterrows()]
+
+
+def build_experiment(burnin_id=burnin_id, reuse=False):
+    """run_sim_args of the experiment: its config and a builder of the sweep(), picking up the burnin_id burn-in
+    (e.g. the one just submitted by calibrate_zones.py). With reuse, only the simulations without a succeeded
+    identical one in the experiment catalog, None if there are none (see memoize_sweep)."""
+    # burn-in simulations (tags, outpath, checkpoints) from the local experiment catalog,
+    # retrieved from COMPS the first time only
+    ser_df = burnin_simulations(burnin_id)
+    cb = build_config()
+    add_reports(cb)
+
+    # ITN and IRS events built once, only the swept coverages are patched in per simulation
+    itn = CampaignTemplate(cb, itn_intervention, 'coverage_level')
+    irs = CampaignTemplate(cb, irs_intervention, 'coverage_level')
+
+    mods = [[ModFn(case_management),  # cm_cov_U5, cm_cov_adults),
+             ModFn(itn, coverage_level=params['itn_coverage']),
+             ModFn(irs, coverage_level=params['irs_coverage']),
+             ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Path',
+                   params['Serialized_Population_Path']),
+             ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Filenames',
+                   params['Serialized_Population_Filenames']),
+             #ModFn(DTKConfigBuilder.set_param, 'Run_Number', seed),
+             # ModFn(DTKConfigBuilder.set_param, 'Scenario', 'Basic'),  # optional
+             # ModFn(DTKConfigBuilder.set_param, 'x_Temporary_Larval_Habitat',
+             #      row['x_Temporary_Larval_Habitat']),
+
+             ]
+            #for seed in range(numseeds)
+            for params in sweep(ser_df)
+            ]
+    if reuse:
+        # succeeded simulations of earlier experiments with the same files and inputs are linked to this one in the
+        # experiment catalog once it is registered, instead of being submitted again. Nothing to submit if all did
+        mods = memoize_sweep(cb, mods, expt_name)
+        if not mods:
+            return None
+    builder = ModBuilder.from_list(mods)
+    return {
+        'exp_name': expt_name,
+        'config_builder': cb,
+        'exp_builder': builder
+    }
+
+
+# run_sim_args is what the `dtk run` command will look for, built when it does (see lazy_run_sim_args)
+__getattr__ = lazy_run_sim_args(build_experiment)
+
 # If you prefer running with `python example_sim.py`, you will need the following block
 if __name__ == "__main__":
-    # SetupParser.init()
-    exp_manager = ExperimentManagerFactory.init()
-    exp_manager.run_simulations(**run_sim_args)
-    # Wait for the simulations to be done
-    exp_manager.wait_for_finished(verbose=True)
-    assert (exp_manager.succeeded())
+    SetupParser.init()
+    run_sim_args = build_experiment(reuse=reuse_simulations)
+    if run_sim_args is not None:
+        exp_manager = ExperimentManagerFactory.init()
+        exp_manager.run_simulations(**run_sim_args)
+        # Wait for the simulations to be done
+        exp_manager.wait_for_finished(verbose=True)
+        assert (exp_manager.succeeded())
+        # recorded with its simulations, and linked to those it reuses, so that later experiments can reuse them
+        ExperimentCatalog().register(exp_manager.experiment.exp_id)
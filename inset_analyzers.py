@@ -0,0 +1,100 @@
+import os
+import pandas as pd
+from report_readers import read_channels
+from analyzer_base import CacheableAnalyzer, calendar_lookup
+from equilibrium import equilibrium_year, recommended_serialize_years
+
+"""
+InsetChart Analyzer
+"""
+
+
+class InsetChartAnalyzer(CacheableAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, channels=None, working_dir=".", start_year=2020):
+        super(InsetChartAnalyzer, self).__init__(working_dir=working_dir, filenames=["output/InsetChart.json"],
+                                                 parse=False)
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.inset_channels = channels or ['Statistical Population', 'New Clinical Cases', 'New Severe Cases',
+                                           'PfHRP2 Prevalence']
+        self.expt_name = expt_name
+        self.start_year = start_year
+
+    def select_simulation_data(self, data, simulation):
+        simdata = pd.DataFrame(read_channels(data[self.filenames[0]], self.inset_channels))
+        simdata['Time'] = simdata.index
+        calendar = calendar_lookup(simdata['Time'], self.start_year, fields=('Day', 'Year', 'date'))
+        simdata['Day'] = calendar['Day']
+        simdata['Year'] = calendar['Year']
+        simdata['date'] = calendar['date']
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                simdata[sweep_var] = simulation.tags[sweep_var]
+            elif sweep_var == 'Run_Number':
+                simdata[sweep_var] = 0
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("No data have been returned... Exiting...")
+            return
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        adf = pd.concat(selected).reset_index(drop=True)
+        self.save_table(adf, 'All_Age_InsetChart.csv')
+
+
+"""
+Burn-in equilibrium Analyzer
+"""
+
+
+class BurninEquilibriumAnalyzer(CacheableAnalyzer):
+    """Years after which each channel of each burn-in simulation is at quasi-equilibrium (see
+    equilibrium.equilibrium_year), and the serialize_years they recommend for the next burn-ins"""
+
+    def __init__(self, expt_name, sweep_variables=None, channels=None, working_dir=".",
+                 report='InsetChart.json', window_years=5, tolerance=0.05):
+        super(BurninEquilibriumAnalyzer, self).__init__(working_dir=working_dir, filenames=[f"output/{report}"],
+                                                        parse=False)
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.channels = channels or ['PfHRP2 Prevalence', 'Daily EIR', 'Adult Vectors']
+        self.expt_name = expt_name
+        self.window_years = window_years
+        self.tolerance = tolerance
+
+    def select_simulation_data(self, data, simulation):
+        channels = read_channels(data[self.filenames[0]], self.channels)
+        simdata = pd.DataFrame({'channel': self.channels,
+                                'equilibrium_year': [equilibrium_year(channels[channel], self.window_years,
+                                                                      self.tolerance)
+                                                     for channel in self.channels],
+                                'duration_years': len(channels[self.channels[0]]) // 365})
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                simdata[sweep_var] = simulation.tags[sweep_var]
+            elif sweep_var == 'Run_Number':
+                simdata[sweep_var] = 0
+        return simdata
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("No data have been returned... Exiting...")
+            return
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        adf = pd.concat(selected).reset_index(drop=True)
+        self.save_table(adf, 'Burnin_Equilibrium.csv')
+        unsettled = adf['equilibrium_year'].isna().sum()
+        print(f'\nRecommended serialize_years: {recommended_serialize_years(adf)} '
+              f'({unsettled} of {len(adf)} simulation channels did not settle)')
@@ -0,0 +1,46 @@
+import os
+import time
+import importlib
+import pandas as pd
+from materialize import materialize_sweep
+
+"""
+Lists the simulations of an experiment script (Burnin_*, pickup10_* or future_sim_*) from its sweep(), without
+building its config or campaign, initializing the SetupParser or querying COMPS. Pickups read their burn-in from
+the local experiment catalog, where it is once the pickup has been built (run or submitted) once.
+With build = True the config and builder are built as well, as `dtk run` does, to check them before submitting,
+which retrieves a burn-in missing from the catalog. With an out_dir as well, the files of every simulation are
+written to out_dir/<expt_name>/<index> by a pool of processes, to look at them before submitting.
+"""
+
+script = 'pickup10_zone_1'  # experiment script, without .py
+build = False
+out_dir = None  # e.g. os.path.join('simulation_outputs', 'materialized'), with build = True
+
+
+def list_sweep(script, build=False, out_dir=None):
+    start = time.perf_counter()
+    module = importlib.import_module(script)
+    imported = time.perf_counter()
+    if build:
+        run_sim_args = module.run_sim_args
+        print(f'config and builder of {run_sim_args["exp_name"]} built in {time.perf_counter() - imported:.2f}s')
+        if out_dir:
+            materializing = time.perf_counter()
+            sweep_mods = list(run_sim_args['exp_builder'].mod_generator)
+            exp_dir = os.path.join(out_dir, run_sim_args['exp_name'])
+            for _ in materialize_sweep(run_sim_args['config_builder'], sweep_mods, out_dir=exp_dir):
+                pass
+            print(f'files of {len(sweep_mods)} simulations written to {exp_dir} in '
+                  f'{time.perf_counter() - materializing:.2f}s')
+    listing = time.perf_counter()
+    sweep_df = pd.DataFrame(module.sweep())
+    pd.set_option('display.width', 200)
+    print(sweep_df.to_string())
+    print(f'{module.expt_name}: {len(sweep_df)} simulations, script imported in {imported - start:.2f}s, '
+          f'sweep listed in {time.perf_counter() - listing:.2f}s')
+    return sweep_df
+
+
+if __name__ == "__main__":
+    list_sweep(script, build=build, out_dir=out_dir)
@@ -0,0 +1,170 @@
+import os
+import json
+import configparser
+from concurrent.futures import ProcessPoolExecutor
+from report_readers import parse_output
+
+"""
+Run analyzers on simulation outputs that sit on local disk, without AnalyzeManager and COMPS.
+Simulations are discovered from a directory tree, filter/select_simulation_data run across a process pool and
+finalize is called once per analyzer with the results in simulation order, as AnalyzeManager does.
+Each output file is read and parsed once per simulation, whatever the number of analyzers reading it.
+"""
+
+
+class LocalSimulation:
+    """Simulation directory with the attributes analyzers use: id, tags and get_path().
+    Tags come from tags.json, or else from the scalar config.json parameters (e.g. Run_Number,
+    x_Temporary_Larval_Habitat), as local experiments keep their tags in the simtools database."""
+
+    def __init__(self, sim_dir):
+        self.sim_dir = os.path.abspath(sim_dir)
+        self.id = os.path.basename(self.sim_dir)
+        self.tags = self.read_tags(self.sim_dir)
+
+    @staticmethod
+    def read_tags(sim_dir):
+        tags_file = os.path.join(sim_dir, 'tags.json')
+        if os.path.exists(tags_file):
+            with open(tags_file) as f:
+                return json.load(f)
+        config_file = os.path.join(sim_dir, 'config.json')
+        if os.path.exists(config_file):
+            with open(config_file) as f:
+                parameters = json.load(f).get('parameters', {})
+            return {k: v for k, v in parameters.items() if isinstance(v, (int, float, str))}
+        return {}
+
+    def get_path(self):
+        return self.sim_dir
+
+    def __repr__(self):
+        return f'LocalSimulation({self.id})'
+
+
+def discover_simulations(experiment_dir):
+    """Simulation directories under experiment_dir: folders with an output/ subfolder and a tags.json or
+    config.json, sorted by path"""
+    simulations = []
+    for root, dirs, files in os.walk(experiment_dir):
+        if 'output' in dirs and ('tags.json' in files or 'config.json' in files):
+            simulations.append(LocalSimulation(root))
+            dirs[:] = []  # no simulations inside a simulation
+        dirs.sort()
+    return sorted(simulations, key=lambda sim: sim.sim_dir)
+
+
+def local_sim_root(ini_file='simtools.ini', block='LOCAL'):
+    """sim_root of the LOCAL block of simtools.ini, where local experiments write their simulations"""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(ini_file)
+    return parser.get(block, 'sim_root').strip()
+
+
+def find_experiment_dir(expt_name, sim_root=None):
+    """Most recent experiment folder named expt_name (local experiments are named '<expt_name>_<timestamp>')"""
+    sim_root = sim_root or local_sim_root()
+    candidates = [os.path.join(sim_root, name) for name in os.listdir(sim_root)
+                  if name == expt_name or name.startswith(f'{expt_name}_')]
+    if not candidates:
+        raise FileNotFoundError(f'No experiment {expt_name} under {sim_root}')
+    return max(candidates, key=os.path.getmtime)
+
+
+def read_outputs(simulation, filenames, parse=True):
+    """Simulation output files as AnalyzeManager hands them to select_simulation_data: raw bytes with parse=False,
+    otherwise json as dicts and csv as DataFrames"""
+    data = {}
+    for fname in filenames:
+        with open(os.path.join(simulation.get_path(), fname), 'rb') as f:
+            content = f.read()
+        data[fname] = parse_output(fname, content) if parse else content
+    return data
+
+
+def select_from_outputs(simulation, analyzers, outputs):
+    """select_simulation_data of each analyzer (None entries are skipped) on the raw outputs of one simulation,
+    reading each file once: a file is parsed once if any analyzer reading it was created with parse=True, and the
+    parsed object goes to every analyzer reading it (the report_readers functions take raw or parsed reports),
+    otherwise they all get the raw bytes. select_simulation_data must not modify the data it is given.
+    Returns a (result,) tuple per analyzer, None where skipped."""
+    to_parse = {fname for analyzer in analyzers if analyzer is not None and getattr(analyzer, 'parse', True)
+                for fname in analyzer.filenames}
+    data = {fname: parse_output(fname, content) if fname in to_parse else content
+            for fname, content in outputs.items()}
+    results = []
+    for analyzer in analyzers:
+        if analyzer is None:
+            results.append(None)
+            continue
+        try:
+            results.append((analyzer.select_simulation_data({fname: data[fname] for fname in analyzer.filenames},
+                                                            simulation),))
+        except Exception as e:
+            raise RuntimeError(f'{type(analyzer).__name__} failed on simulation {simulation.id}: {e!r}') from e
+    return results
+
+
+_worker_analyzers = None
+
+
+def _init_worker(analyzers):
+    global _worker_analyzers
+    _worker_analyzers = analyzers
+
+
+def _analyze_simulation(simulation, analyzers=None):
+    """filter and select_simulation_data of every analyzer for one simulation, with one read of each file"""
+    analyzers = [analyzer if analyzer.filter(simulation) else None for analyzer in analyzers or _worker_analyzers]
+    outputs = {}
+    for analyzer in analyzers:
+        for fname in analyzer.filenames if analyzer is not None else []:
+            if fname not in outputs:
+                with open(os.path.join(simulation.get_path(), fname), 'rb') as f:
+                    outputs[fname] = f.read()
+    return select_from_outputs(simulation, analyzers, outputs)
+
+
+def analyze_local(experiment_dir, analyzers, max_workers=None):
+    """Run the analyzers on every simulation found under experiment_dir across max_workers processes
+    (default: all cores, 1 runs in this process), then finalize each analyzer with its results in simulation order"""
+    simulations = discover_simulations(experiment_dir)
+    if not simulations:
+        print(f'\nWarning: no simulations found under {experiment_dir}')
+    for analyzer in analyzers:
+        if hasattr(analyzer, 'initialize'):
+            analyzer.initialize()
+
+    if max_workers == 1:
+        results = [_analyze_simulation(simulation, analyzers) for simulation in simulations]
+    else:
+        max_workers = max_workers or os.cpu_count()
+        chunksize = max(1, len(simulations) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(analyzers,)) as executor:
+            results = list(executor.map(_analyze_simulation, simulations, chunksize=chunksize))
+
+    for i, analyzer in enumerate(analyzers):
+        all_data = {simulation: result[i][0] for simulation, result in zip(simulations, results)
+                    if result[i] is not None}
+        analyzer.finalize(all_data)
+        if hasattr(analyzer, 'destroy'):
+            analyzer.destroy()
+
+
+if __name__ == "__main__":
+    from summary_analyzers import MonthlyPfPRAnalyzerU5
+
+    user = os.getlogin()  # user initials
+    expt_name = f'{user}_FE_2022_Calibration_zone3_50'
+    working_dir = os.path.join('simulation_outputs')
+    sweep_variables = ['Run_Number', 'x_Temporary_Larval_Habitat']
+
+    analyzers = [
+        MonthlyPfPRAnalyzerU5(expt_name=expt_name,
+                              working_dir=working_dir,
+                              start_year=2010,
+                              end_year=2020,
+                              sweep_variables=sweep_variables),
+    ]
+    analyze_local(find_experiment_dir(expt_name), analyzers)
@@ -0,0 +1,95 @@
+import os
+import copy
+import json
+import zlib
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from campaign_templates import builder_rest, campaign_events, encode_json
+
+"""
+Materialization of the simulations of a sweep in a process pool: each worker gets the config builder once, then
+for each simulation applies its list of ModFn to a copy of it, renders its files (config, campaign, custom reports)
+and optionally writes them to disk or digests them (see simulation_memo.py). Results are streamed back in sweep
+order as they are done, so the consumer (e.g. memoize_sweep) works through the sweep while the pool renders ahead.
+With state=True the config parameters and campaign events of each simulation come back as well, compressed. The
+simulation is then submitted with restore_simulation in place of its list of ModFn, which sets them on the copy of
+the config builder the experiment manager makes, so that the intervention functions of a sweep run once, in the pool.
+"""
+
+_worker_cb = None  # config builder of the sweep, in each worker process
+
+
+def simulation_files(cb):
+    """Files dtk-tools writes for a simulation of cb, as name: content"""
+    files = {}
+    cb.file_writer(lambda name, content: files.__setitem__(name, content))
+    return files
+
+
+def write_files(files, sim_dir):
+    os.makedirs(sim_dir, exist_ok=True)
+    for name, content in files.items():
+        with open(os.path.join(sim_dir, name), 'wb' if isinstance(content, bytes) else 'w') as f:
+            f.write(content)
+
+
+def simulation_state(cb):
+    """Config parameters and campaign events of cb, as compressed json"""
+    state = {'parameters': cb.config['parameters'], 'events': list(campaign_events(cb))}
+    return zlib.compress(encode_json(state).encode())
+
+
+def restore_simulation(cb, state, tags):
+    """ModFn of a simulation materialized with state=True: sets the config parameters and campaign events built
+    for it in the pool, and returns the tags its list of ModFn returned"""
+    state = json.loads(zlib.decompress(state))
+    cb.config['parameters'] = state['parameters']
+    if hasattr(cb.campaign, 'Events'):
+        cb.campaign.Events = state['events']
+    else:
+        cb.campaign['Events'] = state['events']
+    return tags
+
+
+def materialize_simulation(cb, mods, sim_dir=None, digest=None, base_rest=None):
+    """Tags of the simulation a list of ModFn makes of cb, with its files written to sim_dir and digested by
+    digest(sim_cb, files) if given. With the builder_rest of cb as base_rest, its state (see simulation_state) as
+    well, unless the ModFn changed more of cb than its config parameters and campaign events."""
+    sim_cb = copy.deepcopy(cb)
+    tags = {}
+    for mod in mods:
+        tags.update(mod(sim_cb) or {})
+    files = simulation_files(sim_cb)
+    if sim_dir:
+        write_files(files, sim_dir)
+    state = simulation_state(sim_cb) if base_rest is not None and builder_rest(sim_cb) == base_rest else None
+    return {'tags': tags, 'sim_dir': sim_dir, 'digest': digest(sim_cb, files) if digest else None, 'state': state}
+
+
+def sim_directory(out_dir, index):
+    return os.path.join(out_dir, f'{index:05d}') if out_dir else None
+
+
+def _init_worker(cb):
+    global _worker_cb
+    _worker_cb = cb
+
+
+def _materialize(index, mods, out_dir, digest, base_rest):
+    return materialize_simulation(_worker_cb, mods, sim_directory(out_dir, index), digest, base_rest)
+
+
+def materialize_sweep(cb, sweep_mods, processes=None, out_dir=None, digest=None, state=False, chunksize=4):
+    """materialize_simulation of each list of ModFn of sweep_mods, yielded in order. With out_dir the files of
+    the i-th simulation go to out_dir/<i>, with state=True their state comes back for restore_simulation.
+    digest and the ModFn have to be picklable (module level functions), with processes=1 everything runs in this
+    process."""
+    base_rest = builder_rest(cb) if state else None
+    processes = min(processes or os.cpu_count() or 1, len(sweep_mods))
+    if processes <= 1:
+        for index, mods in enumerate(sweep_mods):
+            yield materialize_simulation(cb, mods, sim_directory(out_dir, index), digest, base_rest)
+        return
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(cb,)) as executor:
+        yield from executor.map(_materialize, range(len(sweep_mods)), sweep_mods, repeat(out_dir), repeat(digest),
+                                repeat(base_rest), chunksize=chunksize)
@@ -11,9 +11,11 @@ from dtk.interventions.itn import add_ITN
 ## Import custom reporters
 from malaria.reports.MalariaReport import add_summary_report, add_filtered_report
 from malaria.reports.MalariaReport import add_event_counter_report
-from simtools.Utilities.Experiments import retrieve_experiment
+from experiment_catalog import ExperimentCatalog, burnin_simulations
+from simulation_memo import memoize_sweep
+from campaign_templates import CampaignTemplate
+from simulation_helper import pickup_checkpoint_files, lazy_run_sim_args, add_monthly_summary_report
 from dtk.interventions.outbreakindividual import recurring_outbreak
-import pandas as pd
 import numpy as np
 from malaria.interventions.health_seeking import add_health_seeking
 from dtk.interventions.irs import add_IRS
@@ -26,43 +28,48 @@ sim_start_year = 2010
 pull_year = 50
 
 burnin_id = 'e22cfa13-f631-ed11-a9fc-b88303911bc1'
+# when submitted with this script or calibrate_zones.py, link succeeded simulations of identical earlier experiments
+# instead of rerunning them (`dtk run` and list_sweep.py build the experiment without looking them up)
+reuse_simulations = True
+# one multi-year Monthly_U5 summary report in place of one per year (analyze with single_report = True). Its months
+# are 365 / 12 days aligned to the years, those of the per-year reports are 30 days, so outputs differ between the two
+single_summary_report = False
 # burnin_id = '2022_08_06_21_08_47_004533'
 serialize_year = 50
 
-SetupParser.init()
-cb = DTKConfigBuilder.from_defaults('MALARIA_SIM', Simulation_Duration=pickup_years * 365)
-
-expt = retrieve_experiment(burnin_id)  # Identifies the desired burn-in experiment
-# Loop through unique "tags" to distinguish between burn-in scenarios (ex. varied historical coverage levels)
-ser_df = pd.DataFrame([x.tags for x in expt.simulations])
-ser_df["outpath"] = pd.Series([sim.get_path() for sim in expt.simulations])
-
-cb.update_params({
-    'Demographics_Filenames': [os.path.join('Ghana', 'Ghana_2.5arcmin_demographics.json')],
-    "Air_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
-    "Land_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
-    "Rainfall_Filename": os.path.join('Ghana', 'Ghana_30arcsec_rainfall_daily.bin'),
-    "Relative_Humidity_Filename": os.path.join('Ghana', 'Ghana_30arcsec_relative_humidity_daily.bin'),
-    "Age_Initialization_Distribution_Type": 'DISTRIBUTION_COMPLEX',
-    'x_Base_Population': 1,
-    'x_Birth': 1,
-    # 'x_Temporary_Larval_Habitat': 1
-
-})
-
-cb.update_params({
-    'Serialized_Population_Reading_Type': 'READ',
-    'Serialized_Population_Filenames': ['state-%05d.dtk' % (serialize_year * 365)],
-    'Enable_Random_Generator_From_Serialized_Population': 0,
-    'Serialization_Mask_Node_Read': 0,
-    'Enable_Default_Reporting': 1
-})
-
-set_species(cb, ["arabiensis", "funestus", "gambiae"])
-set_larval_habitat(cb, {"arabiensis": {'TEMPORARY_RAINFALL': 7.5e9, 'CONSTANT': 1e7},
-                        "funestus": {'WATER_VEGETATION': 4e8},
-                        "gambiae": {'TEMPORARY_RAINFALL': 8.3e8, 'CONSTANT': 1e7}
-                        })
+
+def build_config():
+    """Config of the pickup, built by build_experiment"""
+    cb = DTKConfigBuilder.from_defaults('MALARIA_SIM', Simulation_Duration=pickup_years * 365)
+
+    cb.update_params({
+        'Demographics_Filenames': [os.path.join('Ghana', 'Ghana_2.5arcmin_demographics.json')],
+        "Air_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
+        "Land_Temperature_Filename": os.path.join('Ghana', 'Ghana_30arcsec_air_temperature_daily.bin'),
+        "Rainfall_Filename": os.path.join('Ghana', 'Ghana_30arcsec_rainfall_daily.bin'),
+        "Relative_Humidity_Filename": os.path.join('Ghana', 'Ghana_30arcsec_relative_humidity_daily.bin'),
+        "Age_Initialization_Distribution_Type": 'DISTRIBUTION_COMPLEX',
+        'x_Base_Population': 1,
+        'x_Birth': 1,
+        # 'x_Temporary_Larval_Habitat': 1
+
+    })
+
+    cb.update_params({
+        'Serialized_Population_Reading_Type': 'READ',
+        'Serialized_Population_Filenames': ['state-%05d.dtk' % (serialize_year * 365)],
+        'Enable_Random_Generator_From_Serialized_Population': 0,
+        'Serialization_Mask_Node_Read': 0,
+        'Enable_Default_Reporting': 1
+    })
+
+    set_species(cb, ["arabiensis", "funestus", "gambiae"])
+    set_larval_habitat(cb, {"arabiensis": {'TEMPORARY_RAINFALL': 7.5e9, 'CONSTANT': 1e7},
+                            "funestus": {'WATER_VEGETATION': 4e8},
+                            "gambiae": {'TEMPORARY_RAINFALL': 8.3e8, 'CONSTANT': 1e7}
+                            })
+    return cb
+
 
 
 # Add case management including two interventions
@@ -160,71 +167,126 @@ event_list = event_list + ['Received_IRS']
 # event_list = event_list + ['Received_SMC']
 
 """CUSTOM REPORTS"""
-add_filtered_report(cb, start=0, end=pickup_years * 365)
-# Summary report per agebin
-add_summary_report(cb, start=0, interval=365,
-                   age_bins=[0.25, 5],
-                   description='U5_PfPR')
-
-add_summary_report(cb, start=1, interval=365,
-                   age_bins=[0, 5, 10, 18, 100],
-                   description='Annual_Agebin')
-
-for year in range(pickup_years):
-    start_day = 0 + 365 * year
-    sim_year = sim_start_year + year
-    add_summary_report(cb, start=start_day, interval=30,
-                       age_bins=[0, 100],
-                       description=f'Monthly_U5_{sim_year}')
-
-# Enable reporters
-cb.update_params({
-    "Report_Event_Recorder": 1,
-    "Report_Event_Recorder_Individual_Properties": [],
-    "Report_Event_Recorder_Ignore_Events_In_List": 0,
-    "Report_Event_Recorder_Events": event_list,
-    'Custom_Individual_Events': event_list
-})
-# Event_counter_report
-add_event_counter_report(cb, event_trigger_list=event_list, start=0, duration=10000)
-
-recurring_outbreak(cb, start_day=180, repetitions=pickup_years)
+
+
+def add_reports(cb):
+    """Reports of the pickup, added by build_experiment"""
+    add_filtered_report(cb, start=0, end=pickup_years * 365)
+    # Summary report per agebin
+    add_summary_report(cb, start=0, interval=365,
+                       age_bins=[0.25, 5],
+                       description='U5_PfPR')
+
+    add_summary_report(cb, start=1, interval=365,
+                       age_bins=[0, 5, 10, 18, 100],
+                       description='Annual_Agebin')
+
+    if single_summary_report:
+        # one report over all the years, read with the analyzers' single_report=True
+        add_monthly_summary_report(cb, pickup_years, age_bins=[0, 100], description='Monthly_U5')
+    else:
+        for year in range(pickup_years):
+            start_day = 0 + 365 * year
+            sim_year = sim_start_year + year
+            add_summary_report(cb, start=start_day, interval=30,
+                               age_bins=[0, 100],
+                               description=f'Monthly_U5_{sim_year}')
+
+    # Enable reporters
+    cb.update_params({
+        "Report_Event_Recorder": 1,
+        "Report_Event_Recorder_Individual_Properties": [],
+        "Report_Event_Recorder_Ignore_Events_In_List": 0,
+        "Report_Event_Recorder_Events": event_list,
+        'Custom_Individual_Events': event_list
+    })
+    # Event_counter_report
+    add_event_counter_report(cb, event_trigger_list=event_list, start=0, duration=10000)
+
+    recurring_outbreak(cb, start_day=180, repetitions=pickup_years)
+
+
 # run_sim_args is what the `dtk run` command will look for
 user = os.getlogin()  # user initials
 expt_name = f'{user}_FE_2022_Calibration_zone2_{serialize_year}'
 
 """BUILDER"""
-builder = ModBuilder.from_list([[ModFn(case_management),
-                                 ModFn(itn_intervention),
-                                 ModFn(irs_intervention),
-                                 # ModFn(smc_intervention),
-                                 ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Path',
-                                       os.path.join(row['outpath'], 'output')),
-                                 # ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Path',
-                                 #      os.path.join(ser_df[ser_df.Run_Number == seed].outpath.iloc[0], 'output')),
-                                 # ModFn(DTKConfigBuilder.set_param, 'Run_Number', seed),
-                                 ModFn(DTKConfigBuilder.set_param, 'x_Temporary_Larval_Habitat',
-                                       row['x_Temporary_Larval_Habitat']),
-                                 ]
-                                # for itn_cov in [0.3]
-                                # for cm_cov_U5 in [0.2]
-                                # for cm_cov_adults in [0.1]
-                                # for ke in [0.06]
-                                # for hab_scale in np.logspace(-2, np.log10(30), 7)
-                                # for seed in range(numseeds)
-                                for r, row in ser_df.iterrows()
-                                ])
-# (ser_df[ser_df.Run_Number==seed].
-run_sim_args = {
-    'exp_name': expt_name,
-    'config_builder': cb,
-    'exp_builder': builder
-}
+
+
+def sweep(ser_df=None):
+    """Burn-in simulation each simulation picks up from, with its habitat multiplier. The burn-in is looked up in
+    the local experiment catalog only, build_experiment retrieves it from COMPS if it is not there yet."""
+    if ser_df is None:
+        ser_df = burnin_simulations(burnin_id, register=False)
+    return [{'Serialized_Population_Path': os.path.join(row['outpath'], 'output'),
+             # latest checkpoint of the burn-in simulation at or before serialize_year
+             'Serialized_Population_Filenames': pickup_checkpoint_files(serialize_year, row['checkpoints']),
+             'x_Temporary_Larval_Habitat': row['x_Temporary_Larval_Habitat']}
+            for r, row in ser_df.iterrows()]
+
+
+def build_experiment(burnin_id=burnin_id, reuse=False):
+    """run_sim_args of the experiment: its config and a builder of the sweep(), picking up the burnin_id burn-in
+    (e.g. the one just submitted by calibrate_zones.py). With reuse, only the simulations without a succeeded
+    identical one in the experiment catalog, None if there are none (see memoize_sweep)."""
+    # burn-in simulations (tags, outpath, checkpoints) from the local experiment catalog,
+    # retrieved from COMPS the first time only
+    ser_df = burnin_simulations(burnin_id)
+    cb = build_config()
+    add_reports(cb)
+
+    # ITN and IRS events built once for all the simulations (see campaign_templates.py)
+    itn = CampaignTemplate(cb, itn_intervention)
+    irs = CampaignTemplate(cb, irs_intervention)
+
+    mods = [[ModFn(case_management),
+             ModFn(itn),
+             ModFn(irs),
+             # ModFn(smc_intervention),
+             ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Path',
+                   params['Serialized_Population_Path']),
+             ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Filenames',
+                   params['Serialized_Population_Filenames']),
+             # ModFn(DTKConfigBuilder.set_param, 'Serialized_Population_Path',
+             #      os.path.join(ser_df[ser_df.Run_Number == seed].outpath.iloc[0], 'output')),
+             # ModFn(DTKConfigBuilder.set_param, 'Run_Number', seed),
+             ModFn(DTKConfigBuilder.set_param, 'x_Temporary_Larval_Habitat',
+                   params['x_Temporary_Larval_Habitat']),
+             ]
+            # for itn_cov in [0.3]
+            # for cm_cov_U5 in [0.2]
+            # for cm_cov_adults in [0.1]
+            # for ke in [0.06]
+            # for hab_scale in np.logspace(-2, np.log10(30), 7)
+            # for seed in range(numseeds)
+            for params in sweep(ser_df)
+            ]
+    if reuse:
+        # succeeded simulations of earlier experiments with the same files and inputs are linked to this one in the
+        # experiment catalog once it is registered, instead of being submitted again. Nothing to submit if all did
+        mods = memoize_sweep(cb, mods, expt_name)
+        if not mods:
+            return None
+    builder = ModBuilder.from_list(mods)
+    return {
+        'exp_name': expt_name,
+        'config_builder': cb,
+        'exp_builder': builder
+    }
+
+
+# run_sim_args is what the `dtk run` command will look for, built when it does (see lazy_run_sim_args)
+__getattr__ = lazy_run_sim_args(build_experiment)
+
 # If you prefer running with `python example_sim.py`, you will need the following block
 if __name__ == "__main__":
-    # SetupParser.init()
-    exp_manager = ExperimentManagerFactory.init()
-    exp_manager.run_simulations(**run_sim_args)
-    # Wait for the simulations to be done
-    exp_manager.wait_for_finished(verbose=True)
-    assert (exp_manager.succeeded())
+    SetupParser.init()
+    run_sim_args = build_experiment(reuse=reuse_simulations)
+    if run_sim_args is not None:
+        exp_manager = ExperimentManagerFactory.init()
+        exp_manager.run_simulations(**run_sim_args)
+        # Wait for the simulations to be done
+        exp_manager.wait_for_finished(verbose=True)
+        assert (exp_manager.succeeded())
+        # recorded with its simulations, and linked to those it reuses, so that later experiments can reuse them
+        ExperimentCatalog().register(exp_manager.experiment.exp_id)
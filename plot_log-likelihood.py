@@ -6,7 +6,8 @@ import matplotlib as mpl
 mpl.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
-from calibtool.LL_calculators import beta_binomial
+from calibration_helper import score
+from table_io import load_table
 
 user = os.getlogin()  # user initials
 # expt_name = f'{user}_FE_2022_example_w7'
@@ -16,7 +17,7 @@ output_dir = os.path.join('simulation_outputs')
 input_dir = os.path.join('input')
 data_dir = os.path.join('data')
 
-sim_pfpr_df = pd.read_csv(os.path.join(output_dir, expt_name, 'U5_PfPR_ClinicalIncidence.csv'))
+sim_pfpr_df = load_table(os.path.join(output_dir, expt_name, 'U5_PfPR_ClinicalIncidence.csv'))
 sim_pfpr_df.columns = [col.replace(' U5', '') for col in sim_pfpr_df.columns]
 sim_pfpr_df['npos'] = sim_pfpr_df['PfPR'] * sim_pfpr_df['Pop']
 sim_pfpr_df['npos'] = sim_pfpr_df.npos.round(0)
@@ -24,24 +25,6 @@ dhs_pfpr_df = pd.read_csv(os.path.join(data_dir, 'PfPr_DHS_Ghana_Zone_3.csv'))
 sweep_variables = ['x_Temporary_Larval_Habitat', 'Run_Number']
 
 
-def score(sim_df, data_df, sweep_variables):
-    uniq_df = sim_df.groupby(sweep_variables).size().reset_index(name='Freq')
-    ll = []
-    for r, row in uniq_df.iterrows():
-        mask1 = sim_df[sweep_variables[0]] == row[sweep_variables[0]]
-        mask2 = sim_df[sweep_variables[1]] == row[sweep_variables[1]]
-        mask = mask1 & mask2
-        sim_subset_df = sim_df[mask]
-
-        comb_df = data_df.merge(sim_subset_df, on=['year'], how='left')  # ,, 'month'
-        ll = ll + [beta_binomial(comb_df.DHS_n, comb_df.Pop, comb_df.DHS_pos, comb_df.npos)]
-
-    uniq_df['ll'] = ll
-
-    score_df = uniq_df.groupby(['x_Temporary_Larval_Habitat'])['ll'].mean().reset_index(name='ll')
-    return score_df
-
-
 def plot_output(sim_df, data_df, score_df, variable):
     sim_df['date'] = pd.to_datetime([f'{y}-01-01' for y in sim_df.year])  # , sim_df.month)])
     data_df['date'] = pd.to_datetime(
@@ -73,7 +56,7 @@ def plot_output(sim_df, data_df, score_df, variable):
 
 
 if __name__ == "__main__":
-    scores = score(sim_pfpr_df, dhs_pfpr_df, sweep_variables)
+    scores = score(sim_pfpr_df, dhs_pfpr_df, sweep_variables, merge_on=['year'])
     print(scores)
 
     sim_pfpr_agg = sim_pfpr_df.groupby(['year', 'x_Temporary_Larval_Habitat'])['PfPR'].mean().reset_index(name='PfPR')
@@ -0,0 +1,155 @@
+import io
+import os
+import mmap
+import warnings
+import numpy as np
+import pandas as pd
+
+"""
+Readers turning EMOD output reports into numpy arrays
+"""
+
+
+def summary_report_arrays(reports, channels, nrows=None, section='DataByTimeAndAgeBins', start=0):
+    """Read MalariaSummaryReport channels into ndarrays.
+    DataByTimeAndAgeBins channels give one (time, agebin) array, DataByTime channels one time array.
+    When a list of reports is given, nrows reporting intervals from start of each are stacked along time."""
+    if isinstance(reports, dict):
+        reports = [reports]
+    stop = start + nrows if nrows is not None else None
+    return {channel: np.concatenate([np.asarray(report[section][channel][start:stop]) for report in reports])
+            for channel in channels}
+
+
+def _load_json(content):
+    try:
+        import orjson
+        return orjson.loads(content)
+    except ImportError:
+        import json
+        return json.loads(content)
+
+
+def parse_output(fname, content):
+    """Parse the raw content of an output file as AnalyzeManager does for analyzers created with parse=True:
+    json into dicts, csv into a DataFrame, other files are left as bytes"""
+    if fname.endswith('.json'):
+        return _load_json(content)
+    if fname.endswith('.csv'):
+        return pd.read_csv(io.BytesIO(content))
+    return content
+
+
+def _skip_whitespace(buf, pos):
+    while buf[pos:pos + 1] in (b' ', b'\t', b'\r', b'\n'):
+        pos += 1
+    return pos
+
+
+def _channel_data_span(buf, channel, start):
+    """Byte span of the numbers inside Channels[channel]['Data'], or None if it can't be located safely"""
+    key = b'"' + channel.encode() + b'"'
+    pos = buf.find(key, start)
+    while pos != -1:
+        after = pos + len(key)
+        # the channel name is an object key, not e.g. a value in the Header
+        colon = _skip_whitespace(buf, after)
+        if buf[colon:colon + 1] == b':':
+            break
+        pos = buf.find(key, after)
+    if pos == -1:
+        return None
+    data = buf.find(b'"Data"', after)
+    if data == -1 or buf.find(b'}', after, data) != -1:
+        return None  # 'Data' is not in this channel's object
+    first = buf.find(b'[', data)
+    last = buf.find(b']', first)
+    if first == -1 or last == -1:
+        return None
+    return first + 1, last
+
+
+def _parse_numbers(content):
+    # fromstring stops at anything that is not a number, e.g. quoted values, with a warning or an error
+    # depending on the numpy version
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(content, sep=',')
+        except (ValueError, DeprecationWarning):
+            return None
+    if len(values) != (content.count(b',') + 1 if content.strip() else 0):
+        return None
+    # keep json typing: integers stay integers unless any value has a fraction, exponent, nan or inf
+    if not any(c in content for c in (b'.', b'e', b'E', b'n', b'N')):
+        return values.astype(np.int64)
+    return values
+
+
+def _read_channels(buf, channels):
+    start = buf.find(b'"Channels"')
+    if start == -1:
+        return None
+    arrays = {}
+    for channel in channels:
+        span = _channel_data_span(buf, channel, start)
+        values = _parse_numbers(buf[span[0]:span[1]]) if span else None
+        if values is None:
+            return None
+        arrays[channel] = values
+    return arrays
+
+
+def read_channels(source, channels):
+    """Read only the requested Channels[...]['Data'] arrays of an InsetChart-style report
+    (InsetChart.json, ReportMalariaFiltered.json, ReportEventCounter.json) into numeric ndarrays.
+    source is the raw file content (analyzers created with parse=False), a path, or an already parsed report.
+    Only the requested arrays are parsed, so parse time and memory follow the channels and not the file size.
+    Falls back to parsing the whole report when the file layout is not the expected one."""
+    if isinstance(source, dict):
+        return {channel: np.asarray(source['Channels'][channel]['Data']) for channel in channels}
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                arrays = _read_channels(buf, channels)
+                if arrays is None:
+                    return read_channels(_load_json(buf[:]), channels)
+                return arrays
+
+    arrays = _read_channels(source, channels)
+    if arrays is None:
+        return read_channels(_load_json(source), channels)
+    return arrays
+
+
+def read_event_recorder(source, events=None, usecols=None, time_range=None, chunksize=200000):
+    """Read ReportEventRecorder.csv in chunks of chunksize rows, keeping only the usecols columns and the rows
+    with an Event_Name in events and a Time in the half-open time_range (first_day, end_day), so the full
+    report never has to be held as a DataFrame. Event_Name is returned as a categorical.
+    source is the raw file content (analyzers created with parse=False), a path, or an already parsed DataFrame.
+    Rows keep their index in the report."""
+    if isinstance(source, pd.DataFrame):
+        if usecols is not None:
+            source = source[[col for col in source.columns if col in usecols]]
+        chunks = [source]
+    else:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        chunks = pd.read_csv(source, usecols=usecols, chunksize=chunksize)
+
+    selected = []
+    for chunk in chunks:
+        keep = np.ones(len(chunk), dtype=bool)
+        if events is not None:
+            keep &= chunk['Event_Name'].isin(events).to_numpy()
+        if time_range is not None:
+            keep &= ((chunk['Time'] >= time_range[0]) & (chunk['Time'] < time_range[1])).to_numpy()
+        selected.append(chunk[keep])
+    if not selected:  # report without any row
+        return pd.DataFrame(columns=usecols)
+
+    df = pd.concat(selected)
+    if 'Event_Name' in df.columns:
+        df['Event_Name'] = df['Event_Name'].astype(pd.CategoricalDtype(events) if events is not None else 'category')
+    return df
@@ -1,13 +1,14 @@
 import copy
 import os
+import re
+import warnings
 import pandas as pd
 import numpy as np
 from dtk.interventions.outbreakindividual import recurring_outbreak
 from dtk.utils.core.DTKConfigBuilder import DTKConfigBuilder
 from dtk.vector.species import update_species_param, set_species, set_larval_habitat
 from malaria.interventions.malaria_drugs import set_drug_param
-from malaria.reports.MalariaReport import add_filtered_report
-from simtools.Utilities.Experiments import retrieve_experiment
+from malaria.reports.MalariaReport import add_filtered_report, add_summary_report
 
 """Script and functions adapted from NU malaria modelings HBHI package"""
 
@@ -31,6 +32,24 @@ def update_cb(cb, years, serialize, ser_time_step=None):
     })
 
     # Serialization
+    set_serialization(cb, years, serialize, ser_time_step)
+
+    # Report
+    cb.update_params({
+        'Enable_Default_Reporting': 0,
+        'Enable_Demographics_Risk': 1,
+        'Enable_Property_Output': 0,
+        'Enable_Vector_Species_Report': 0,
+        'Report_Detection_Threshold_Blood_Smear_Parasites': 50,
+        "Parasite_Smear_Sensitivity": 0.02,  # 50/uL
+        'RDT_Sensitivity': 0.1
+    })
+
+    return cb
+
+
+def set_serialization(cb, years, serialize, ser_time_step=None):
+    """Write the population at the ser_time_step days (default the end of the simulation), e.g. a checkpoint_ladder"""
     if ser_time_step is None:
         ser_time_step = [365 * years]
     if serialize:
@@ -48,19 +67,61 @@ def update_cb(cb, years, serialize, ser_time_step=None):
             'Serialization_Type': 'NONE',
             'Serialized_Population_Writing_Type': 'NONE'
         })
+    return cb
 
-    # Report
-    cb.update_params({
-        'Enable_Default_Reporting': 0,
-        'Enable_Demographics_Risk': 1,
-        'Enable_Property_Output': 0,
-        'Enable_Vector_Species_Report': 0,
-        'Report_Detection_Threshold_Blood_Smear_Parasites': 50,
-        "Parasite_Smear_Sensitivity": 0.02,  # 50/uL
-        'RDT_Sensitivity': 0.1
-    })
 
-    return cb
+def checkpoint_ladder(years, every=5, first=None):
+    """Serialization time steps every `every` years from year `first` (default every) and at the end of a
+    years long burn-in"""
+    first = first or every
+    return [365 * year for year in range(first, years, every)] + [365 * years]
+
+
+def burnin_checkpoints(sim_path):
+    """Days of the checkpoints written by a burn-in simulation, from the state-<day>.dtk files of its output"""
+    days = set()
+    for fname in os.listdir(os.path.join(sim_path, 'output')):
+        match = re.match(r'state-(\d+)(-\d+)?\.dtk$', fname)
+        if match:
+            days.add(int(match.group(1)))
+    return sorted(days)
+
+
+def pickup_checkpoint(serialize_year, checkpoint_days=None):
+    """Day of the latest yearly checkpoint at or before year serialize_year of a burn-in simulation, from the
+    checkpoint_days recorded for it in the experiment catalog. Burn-ins run without interventions, so once they are at
+    equilibrium (see equilibrium.py) an earlier yearly checkpoint stands for the population at serialize_year and one
+    burn-in serves pickups starting in different years. Without recorded checkpoints, those of the burn-ins'
+    checkpoint ladder are assumed, and day 365 * serialize_year if none of them fits. Warns when picking up from
+    before serialize_year."""
+    if not isinstance(checkpoint_days, (list, tuple)) or not checkpoint_days:
+        checkpoint_days = checkpoint_ladder(serialize_year, every=5, first=20)
+    candidates = [day for day in checkpoint_days if day <= 365 * serialize_year and day % 365 == 0]
+    day = max(candidates) if candidates else 365 * serialize_year
+    if day < 365 * serialize_year:
+        warnings.warn(f'Picking up from the checkpoint of year {day // 365}, before serialize_year {serialize_year}')
+    return day
+
+
+def pickup_checkpoint_files(serialize_year, checkpoint_days=None):
+    """Serialized_Population_Filenames of a pickup of a burn-in simulation, see pickup_checkpoint"""
+    return ['state-%05d.dtk' % pickup_checkpoint(serialize_year, checkpoint_days)]
+
+
+def lazy_run_sim_args(build_experiment):
+    """Module __getattr__ of the experiment scripts (__getattr__ = lazy_run_sim_args(build_experiment)):
+    run_sim_args, what `dtk run` looks for, is built on first access only. Importing a script to list its
+    sweep then neither initializes the SetupParser, queries COMPS nor builds the config and campaign."""
+    built = {}
+
+    def __getattr__(name):
+        if name != 'run_sim_args':
+            raise AttributeError(f"module {build_experiment.__module__!r} has no attribute {name!r}")
+        if name not in built:
+            built[name] = build_experiment()
+        return built[name]
+
+    return __getattr__
 
 
 def set_vectors_and_habitats_sweep(cb, larv_hab_multiplier):
@@ -77,6 +138,16 @@ def set_vectors_and_habitats_sweep(cb, larv_hab_multiplier):
     return {'larv_hab_multiplier': larv_hab_multiplier}
 
 
+def add_monthly_summary_report(cb, years, age_bins, description, start_day=0, periods_per_year=12):
+    """One MalariaSummaryReport covering years years from start_day in place of one report per year.
+    The 365 / periods_per_year day interval gives periods_per_year reports per year aligned to the years,
+    read with the analyzers' single_report=True (file MalariaSummaryReport_<description>.json).
+    Used by the pickup and future_sim scripts with single_summary_report = True. Their per-year reports have 30 day
+    intervals instead, so switching changes the simulation outputs and how they compare with experiments already run."""
+    add_summary_report(cb, start=start_day, interval=365 / periods_per_year, duration_days=365 * years,
+                       age_bins=age_bins, description=description)
+
+
 def set_input_files(cb, my_ds, demographic_suffix='_2.5arcmin', climate_suffix='_30arcsec_air'):
     if demographic_suffix is not None:
         if not demographic_suffix.startswith('_') and not demographic_suffix == '':
@@ -0,0 +1,113 @@
+import os
+import json
+import hashlib
+import functools
+from simtools.ModBuilder import ModFn
+from experiment_catalog import ExperimentCatalog
+from materialize import materialize_simulation, materialize_sweep, restore_simulation
+
+"""
+Memoization of simulations across experiments. A simulation is identified by a hash of what it runs from: the
+files dtk-tools writes for it (config, campaign, custom reports) and the checksums of the input files its config
+names. Simulations of a sweep whose hash matches a simulation that succeeded in an experiment of the experiment
+catalog are not submitted again. They are linked to the new experiment in the catalog instead, once it is
+registered after submission (see ExperimentCatalog.defer_links), from where the analysis scripts pick them up with
+its simulations.
+"""
+
+# *_Filename(s) parameters that do not name input files under input_root
+NON_INPUT_FILES = ['Campaign_Filename', 'Custom_Reports_Filename', 'Serialized_Population_Filenames']
+
+
+def input_files(config):
+    """Input files named by the *_Filename and *_Filenames parameters of a config"""
+    parameters = config.get('parameters', config)
+    fnames = set()
+    for name, value in parameters.items():
+        if (name.endswith('_Filename') or name.endswith('_Filenames')) and name not in NON_INPUT_FILES:
+            fnames.update(fname for fname in (value if isinstance(value, list) else [value]) if fname)
+    return sorted(fnames)
+
+
+@functools.lru_cache(maxsize=256)
+def _sha1(path, size, mtime_ns):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def file_checksum(path):
+    """sha1 of a file, computed once per size/mtime. None if the file is not on this machine (e.g. inputs that
+    only sit in a COMPS asset collection), the hash then relies on its name."""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return _sha1(path, stat.st_size, stat.st_mtime_ns)
+
+
+def input_checksums(config, input_root='input'):
+    checksums = {}
+    for fname in input_files(config):
+        checksums[fname] = file_checksum(os.path.join(input_root, fname))
+        if fname.endswith('.bin'):  # climate files come with a .bin.json header
+            checksums[f'{fname}.json'] = file_checksum(os.path.join(input_root, f'{fname}.json'))
+    return checksums
+
+
+def canonical(content):
+    """json content with sorted keys and no whitespace, so formatting does not change the hash"""
+    try:
+        return json.dumps(json.loads(content), sort_keys=True, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return content if isinstance(content, str) else repr(content)
+
+
+def simulation_digest(sim_cb, files, input_root='input'):
+    """Hash of a simulation from its files and input checksums, the digest of materialize_simulation"""
+    description = {'files': {name: canonical(content) for name, content in files.items()},
+                   'inputs': input_checksums(sim_cb.config, input_root)}
+    return hashlib.sha1(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def simulation_hash(cb, mods, input_root='input'):
+    """Hash of the simulation a builder's list of ModFn makes of cb: its files and input checksums"""
+    digest = functools.partial(simulation_digest, input_root=input_root)
+    return materialize_simulation(cb, mods, digest=digest)['digest']
+
+
+def tag_simulation_hash(cb, simulation_hash):
+    """ModFn tagging a simulation with its hash, without changing its files"""
+    return {'Simulation_Hash': simulation_hash}
+
+
+def memoize_sweep(cb, sweep_mods, expt_name, catalog=None, input_root='input', processes=None):
+    """The lists of ModFn of sweep_mods to submit: those without a succeeded simulation of the same hash in the
+    experiment catalog, tagged with their hash so that they can be reused once registered in the catalog.
+    The succeeded simulations are linked to the experiment named expt_name registered next instead of being run
+    again, none if every simulation already succeeded: there is then nothing to submit.
+    The latest experiment of that name, e.g. submitted with `dtk run`, is registered first so that its simulations
+    can be reused. Simulations are built and hashed in a pool of processes (see materialize_sweep), those to submit
+    restore what the pool built for them instead of applying their ModFn again."""
+    catalog = catalog or ExperimentCatalog()
+    catalog.register_latest(expt_name)
+    digest = functools.partial(simulation_digest, input_root=input_root)
+    to_run, reused = [], []
+    simulations = materialize_sweep(cb, sweep_mods, processes=processes, digest=digest, state=True)
+    for mods, simulation in zip(sweep_mods, simulations):
+        sim_hash = simulation['digest']
+        sim_id = catalog.succeeded_simulation('Simulation_Hash', sim_hash)
+        if sim_id is None:
+            if simulation['state'] is not None:
+                mods = [ModFn(restore_simulation, simulation['state'], simulation['tags'])]
+            to_run.append(mods + [ModFn(tag_simulation_hash, sim_hash)])
+        else:
+            reused.append(sim_id)
+    catalog.defer_links(expt_name, reused if to_run else [])
+    if not to_run:
+        print(f'All {len(sweep_mods)} simulations of {expt_name} already succeeded, nothing to submit')
+    elif reused:
+        print(f'{len(reused)} of {len(sweep_mods)} simulations of {expt_name} already succeeded, '
+              f'linked instead of submitted')
+    return to_run
@@ -0,0 +1,303 @@
+import os
+import pandas as pd
+import numpy as np
+from report_readers import summary_report_arrays
+from analyzer_base import CacheableAnalyzer
+
+"""
+MalariaSummaryReport Analyzer
+"""
+
+# DataByTimeAndAgeBins channels and the column names used in the agebin outputs
+AGEBIN_CHANNELS = {'PfPR by Age Bin': 'PfPR',
+                   'Annual Clinical Incidence by Age Bin': 'Cases',
+                   'Annual Severe Incidence by Age Bin': 'Severe cases',
+                   'Annual Mild Anemia by Age Bin': 'Mild anaemia',
+                   'Annual Moderate Anemia by Age Bin': 'Moderate anaemia',
+                   'Annual Severe Anemia by Age Bin': 'Severe anaemia',
+                   'New Infections by Age Bin': 'New infections',
+                   'Mean Log Parasite Density by Age Bin': 'Mean Log Parasite Density',
+                   'Average Population by Age Bin': 'Pop'}
+
+
+def agebin_long_format(arrays, nperiods):
+    """Reshape (years * nperiods, agebin) arrays into columns ordered by year, then agebin, then period"""
+    return {column: array.reshape(-1, nperiods, array.shape[-1]).transpose(0, 2, 1).ravel()
+            for column, array in arrays.items()}
+
+
+### PER AGEBIN
+# AnnualAgebinPfPRAnalyzer
+class AnnualAgebinPfPRAnalyzer(CacheableAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020,
+                 end_year=2025, burnin=None):
+
+        super(AnnualAgebinPfPRAnalyzer, self).__init__(working_dir=working_dir,
+                                                       filenames=[
+                                                           f"output/MalariaSummaryReport_Annual_Agebin.json"])
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.expt_name = expt_name
+        self.start_year = start_year
+        self.end_year = end_year
+        self.burnin = burnin
+
+    def select_simulation_data(self, data, simulation):
+
+        report = data[self.filenames[0]]
+        nyears = (self.end_year - self.start_year)
+        age_bins = report['Metadata']['Age Bins']
+        pfpr2to10 = summary_report_arrays(report, ['PfPR_2to10'], nrows=nyears, section='DataByTime')['PfPR_2to10']
+
+        channels = ['PfPR by Age Bin', 'Annual Clinical Incidence by Age Bin', 'Annual Severe Incidence by Age Bin',
+                    'Average Population by Age Bin']
+        arrays = summary_report_arrays(report, channels, nrows=nyears)
+        columns = agebin_long_format({AGEBIN_CHANNELS[ch]: arrays[ch] for ch in channels}, nperiods=nyears)
+
+        adf = pd.DataFrame({'year': np.tile(np.arange(self.start_year, self.end_year), len(age_bins)),
+                            **columns,
+                            'agebin': np.repeat(age_bins, nyears),
+                            'pfpr2to10': np.tile(pfpr2to10, len(age_bins))})
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                try:
+                    adf[sweep_var] = simulation.tags[sweep_var]
+                except:
+                    adf[sweep_var] = '-'.join([str(x) for x in simulation.tags[sweep_var]])
+            elif sweep_var == 'Run_Number':
+                adf[sweep_var] = 0
+
+        return adf
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("\nWarning: No data have been returned... Exiting...")
+            return
+        adf = pd.concat(selected).reset_index(drop=True)
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        print(f'\nSaving outputs to: {os.path.join(self.working_dir, self.expt_name)}')
+
+        # Discard early years used as burnin
+        if self.burnin is not None:
+            adf = adf[adf['year'] >= self.start_year + self.burnin]
+        adf = adf.loc[adf['agebin'] <= 100]
+        self.save_table(adf, 'Agebin_PfPR_ClinicalIncidence_annual.csv')
+
+
+# MonthlyAgebinPfPRAnalyzer
+class SummaryReportAnalyzer(CacheableAnalyzer):
+    """Monthly or weekly MalariaSummaryReport_<report_name>_<year>.json reports of start_year to end_year - 1 as one
+    table, built from arrays of all years at once. channels maps DataByTimeAndAgeBins channels to output columns,
+    time_channels DataByTime channels to output columns. With age_groups ({label: age bin index}) each channel gives
+    a '<column> <label>' column per age group, all from the same read of the report, otherwise rows are in long
+    format with an agebin column and age bins from max_agebin up are dropped.
+    With single_report the years are sliced from one continuous MalariaSummaryReport_<report_name>.json starting
+    in report_start_year (default start_year), see simulation_helper.add_monthly_summary_report."""
+
+    periods = {'month': 12, 'week': 52}
+
+    def __init__(self, expt_name, report_name, output_file, channels=None, time_channels=None, age_groups=None,
+                 period='month', sweep_variables=None, working_dir='./', start_year=2020, end_year=2030,
+                 burnin=None, filter_exists=False, max_agebin=None, single_report=False, report_start_year=None):
+
+        if single_report:
+            filenames = [f"output/MalariaSummaryReport_{report_name}.json"]
+        else:
+            filenames = [f"output/MalariaSummaryReport_{report_name}_{x}.json" for x in range(start_year, end_year)]
+        super(SummaryReportAnalyzer, self).__init__(working_dir=working_dir, filenames=filenames)
+        self.sweep_variables = sweep_variables or ["Run_Number"]
+        self.expt_name = expt_name
+        self.output_file = output_file
+        self.channels = channels or AGEBIN_CHANNELS
+        self.time_channels = time_channels or {}
+        self.age_groups = age_groups
+        self.period = period
+        self.start_year = start_year
+        self.end_year = end_year
+        self.burnin = burnin
+        self.filter_exists = filter_exists
+        self.max_agebin = max_agebin
+        self.single_report = single_report
+        self.report_start_year = report_start_year if report_start_year is not None else start_year
+
+    def filter(self, simulation):
+        if self.filter_exists:
+            file = os.path.join(simulation.get_path(), self.filenames[0])
+            return os.path.exists(file)
+        else:
+            return True
+
+    def select_simulation_data(self, data, simulation):
+
+        reports = [data[fname] for fname in self.filenames]
+        nperiods = self.periods[self.period]
+        years = np.arange(self.start_year, self.end_year)
+        # one (years * nperiods, agebin) array per channel and one years * nperiods array per time channel
+        if self.single_report:
+            rows = dict(nrows=len(years) * nperiods, start=(self.start_year - self.report_start_year) * nperiods)
+        else:
+            rows = dict(nrows=nperiods)
+        arrays = summary_report_arrays(reports, self.channels.keys(), **rows)
+        time_arrays = summary_report_arrays(reports, self.time_channels.keys(), section='DataByTime', **rows)
+        if any(len(array) != len(years) * nperiods for array in arrays.values()):
+            raise ValueError(f'{self.filenames[0]} does not cover {nperiods} {self.period}s of each year '
+                             f'from {self.start_year} to {self.end_year - 1}')
+        time_columns = {column: time_arrays[ch] for ch, column in self.time_channels.items()}
+
+        if self.age_groups is None:
+            age_bins = reports[0]['Metadata']['Age Bins']
+            columns = agebin_long_format({column: arrays[ch] for ch, column in self.channels.items()},
+                                         nperiods=nperiods)
+            adf = pd.DataFrame({self.period: np.tile(np.arange(1, nperiods + 1), len(years) * len(age_bins)),
+                                **columns,
+                                **{column: np.repeat(values.reshape(-1, nperiods), len(age_bins), axis=0).ravel()
+                                   for column, values in time_columns.items()},
+                                'year': np.repeat(years, nperiods * len(age_bins)),
+                                'agebin': np.tile(np.repeat(age_bins, nperiods), len(years))})
+        else:
+            adf = pd.DataFrame({self.period: np.tile(np.arange(1, nperiods + 1), len(years)),
+                                **{f'{column} {label}': arrays[ch][:, index]
+                                   for label, index in self.age_groups.items()
+                                   for ch, column in self.channels.items()},
+                                **time_columns,
+                                'year': np.repeat(years, nperiods)})
+
+        for sweep_var in self.sweep_variables:
+            if sweep_var in simulation.tags.keys():
+                try:
+                    adf[sweep_var] = simulation.tags[sweep_var]
+                except:
+                    adf[sweep_var] = '-'.join([str(x) for x in simulation.tags[sweep_var]])
+            elif sweep_var == 'Run_Number':
+                adf[sweep_var] = 0
+
+        return adf
+
+    def finalize(self, all_data):
+
+        selected = [data for sim, data in all_data.items()]
+        if len(selected) == 0:
+            print("\nWarning: No data have been returned... Exiting...")
+            return
+
+        if not os.path.exists(os.path.join(self.working_dir, self.expt_name)):
+            os.mkdir(os.path.join(self.working_dir, self.expt_name))
+
+        print(f'\nSaving outputs to: {os.path.join(self.working_dir, self.expt_name)}')
+
+        adf = pd.concat(selected).reset_index(drop=True)
+        if self.burnin is not None:
+            adf = adf[adf['year'] > self.start_year + self.burnin]
+        if self.max_agebin is not None:
+            adf = adf.loc[adf['agebin'] < self.max_agebin]
+        self.save_table(adf, self.output_file)
+
+
+# channels of the U5/U10 summary reports, read for the age bin at index 1 (e.g. 0.25-5 years of [0.25, 5, 125])
+AGE_GROUP_CHANNELS = {'PfPR by Age Bin': 'PfPR',
+                      'Annual Clinical Incidence by Age Bin': 'Cases',
+                      'Annual Severe Incidence by Age Bin': 'Severe cases',
+                      'Average Population by Age Bin': 'Pop'}
+TIME_CHANNELS = {'PfPR_2to10': 'PfPR_2to10',
+                 'Annual EIR': 'annualeir'}
+
+
+class MonthlyAgebinPfPRAnalyzer(SummaryReportAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020,
+                 end_year=2023,
+                 burnin=None, filter_exists=False, **kwargs):
+
+        super(MonthlyAgebinPfPRAnalyzer, self).__init__(expt_name, report_name='Monthly_Agebin',
+                                                        output_file='Agebin_PfPR_ClinicalIncidence.csv',
+                                                        channels=AGEBIN_CHANNELS,
+                                                        sweep_variables=sweep_variables, working_dir=working_dir,
+                                                        start_year=start_year, end_year=end_year, burnin=burnin,
+                                                        filter_exists=filter_exists, max_agebin=100, **kwargs)
+
+
+### PER AGE GROUP
+# MonthlyPfPRAnalyzerU5
+class MonthlyPfPRAnalyzerU5(SummaryReportAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020, end_year=2030,
+                 burnin=None, filter_exists=False, **kwargs):
+
+        super(MonthlyPfPRAnalyzerU5, self).__init__(expt_name, report_name='Monthly_U5',
+                                                    output_file='U5_PfPR_ClinicalIncidence.csv',
+                                                    channels=AGE_GROUP_CHANNELS, time_channels=TIME_CHANNELS,
+                                                    age_groups={'U5': 1},
+                                                    sweep_variables=sweep_variables, working_dir=working_dir,
+                                                    start_year=start_year, end_year=end_year, burnin=burnin,
+                                                    filter_exists=filter_exists, **kwargs)
+
+
+class MonthlyPfPRAnalyzerU10(SummaryReportAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020, end_year=2030,
+                 burnin=None, filter_exists=False, **kwargs):
+
+        super(MonthlyPfPRAnalyzerU10, self).__init__(expt_name, report_name='Monthly_U10',
+                                                     output_file='U10_PfPR_ClinicalIncidence.csv',
+                                                     channels=AGE_GROUP_CHANNELS,
+                                                     age_groups={'U10': 1},
+                                                     sweep_variables=sweep_variables, working_dir=working_dir,
+                                                     start_year=start_year, end_year=end_year, burnin=burnin,
+                                                     filter_exists=filter_exists, **kwargs)
+
+
+### FOR EXERCISE, WEEKLY REPORTING
+# WeeklyPfPRAnalyzerU5
+class WeeklyPfPRAnalyzerU5(SummaryReportAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020, end_year=2030,
+                 burnin=None, filter_exists=False, **kwargs):
+
+        super(WeeklyPfPRAnalyzerU5, self).__init__(expt_name, report_name='Weekly_U5',
+                                                   output_file='U5_PfPR_ClinicalIncidence_weekly.csv',
+                                                   channels=AGE_GROUP_CHANNELS,
+                                                   age_groups={'U5': 1}, period='week',
+                                                   sweep_variables=sweep_variables, working_dir=working_dir,
+                                                   start_year=start_year, end_year=end_year, burnin=burnin,
+                                                   filter_exists=filter_exists, **kwargs)
+
+
+"""
+With IP filter
+"""
+
+
+class MonthlyPfPRAnalyzerU5IP(SummaryReportAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020, end_year=2030,
+                 burnin=None, filter_exists=False, ipfilter='', **kwargs):
+
+        super(MonthlyPfPRAnalyzerU5IP, self).__init__(expt_name, report_name=f'Monthly_U5{ipfilter}',
+                                                      output_file=f'U5{ipfilter}_PfPR_ClinicalIncidence.csv',
+                                                      channels=AGE_GROUP_CHANNELS, time_channels=TIME_CHANNELS,
+                                                      age_groups={'U5': 1},
+                                                      sweep_variables=sweep_variables, working_dir=working_dir,
+                                                      start_year=start_year, end_year=end_year, burnin=burnin,
+                                                      filter_exists=filter_exists, **kwargs)
+        self.ipfilter = ipfilter
+
+
+class MonthlyAgebinPfPRAnalyzerIP(SummaryReportAnalyzer):
+
+    def __init__(self, expt_name, sweep_variables=None, working_dir='./', start_year=2020,
+                 end_year=2023, ipfilter='',
+                 burnin=None, filter_exists=False, **kwargs):
+
+        super(MonthlyAgebinPfPRAnalyzerIP, self).__init__(expt_name, report_name=f'Monthly_Agebin{ipfilter}',
+                                                          output_file=f'Agebin{ipfilter}_PfPR_ClinicalIncidence.csv',
+                                                          channels=AGEBIN_CHANNELS,
+                                                          sweep_variables=sweep_variables, working_dir=working_dir,
+                                                          start_year=start_year, end_year=end_year, burnin=burnin,
+                                                          filter_exists=filter_exists, max_agebin=100, **kwargs)
+        self.ipfilter = ipfilter
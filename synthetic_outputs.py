@@ -0,0 +1,129 @@
+import os
+import json
+import itertools
+import numpy as np
+import pandas as pd
+
+"""
+Synthetic EMOD simulation outputs for benchmarking analyzer_collection.py without a COMPS experiment.
+Each simulation directory holds a tags.json and the output/ reports read by the analyzers, at a configurable scale.
+"""
+
+INSET_CHANNELS = ['Statistical Population', 'New Clinical Cases', 'New Severe Cases', 'PfHRP2 Prevalence',
+                  'Adult Vectors', 'Infected', 'Daily Bites per Human', 'Daily EIR', 'Mean Parasitemia', 'Rainfall',
+                  'New Infections', 'Newly Symptomatic']
+EVENTS = ['Received_Treatment', 'Received_Severe_Treatment', 'Bednet_Got_New_One', 'Bednet_Using',
+          'Bednet_Discarded', 'Received_IRS', 'Received_SMC']
+SUMMARY_CHANNELS = ['PfPR by Age Bin', 'Annual Clinical Incidence by Age Bin', 'Annual Severe Incidence by Age Bin',
+                    'Annual Mild Anemia by Age Bin', 'Annual Moderate Anemia by Age Bin',
+                    'Annual Severe Anemia by Age Bin', 'New Infections by Age Bin',
+                    'Mean Log Parasite Density by Age Bin']
+AGE_BINS = [0.25, 1, 2, 5, 10, 15, 20, 30, 50, 125]
+
+
+def inset_chart(rng, ndays, channels, population=1000):
+    """InsetChart-style report with a seasonal signal per channel"""
+    season = 1 + 0.8 * np.sin(2 * np.pi * np.arange(ndays) / 365)
+    data = {}
+    for channel in channels:
+        if channel == 'Statistical Population':
+            values = np.round(population * (1 + np.arange(ndays) / 365 * 0.02)).astype(int).tolist()
+        elif channel in ('PfHRP2 Prevalence', 'Infected'):
+            values = np.clip(0.3 * season + rng.normal(0, 0.02, ndays), 0, 1).tolist()
+        elif channel in EVENTS:
+            values = rng.poisson(5 * season).tolist()
+        else:
+            values = (rng.gamma(2, 1, ndays) * season).tolist()
+        data[channel] = {'Data': values, 'Units': ''}
+    return {'Header': {'Timesteps': ndays, 'Channels': len(channels)}, 'Channels': data}
+
+
+def summary_report(rng, nintervals, age_bins, interval):
+    """MalariaSummaryReport with nintervals reporting intervals"""
+    nages = len(age_bins)
+    by_age = {}
+    for channel in SUMMARY_CHANNELS:
+        if channel == 'PfPR by Age Bin':
+            values = rng.uniform(0, 0.6, (nintervals, nages))
+        else:
+            values = rng.gamma(2, 0.5, (nintervals, nages))
+        by_age[channel] = values.tolist()
+    by_age['Average Population by Age Bin'] = rng.integers(50, 500, (nintervals, nages)).astype(float).tolist()
+    return {'Metadata': {'Age Bins': list(age_bins), 'Reporting_Interval': interval},
+            'DataByTime': {'PfPR_2to10': rng.uniform(0, 0.6, nintervals).tolist(),
+                           'Annual EIR': rng.gamma(2, 5, nintervals).tolist(),
+                           'Time Of Report': (np.arange(1, nintervals + 1) * interval).tolist()},
+            'DataByTimeAndAgeBins': by_age}
+
+
+def event_recorder(rng, ndays, events, rows_per_year, population=1000):
+    nrows = int(rows_per_year * ndays / 365)
+    return pd.DataFrame({'Time': np.sort(rng.integers(1, ndays, nrows)).astype(float),
+                         'Node_ID': 1,
+                         'Event_Name': rng.choice(events, nrows),
+                         'Individual_ID': rng.integers(1, population * 2, nrows),
+                         'Age': rng.uniform(0, 365 * 80, nrows),
+                         'Gender': rng.choice(['M', 'F'], nrows),
+                         'Infected': rng.integers(0, 2, nrows),
+                         'Infectiousness': rng.uniform(0, 1, nrows)})
+
+
+def write_json(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f)
+
+
+def write_simulation(sim_dir, tags, rng, start_year=2020, years=10, age_bins=None, inset_channels=None,
+                     events=None, event_rows_per_year=20000):
+    """Write one simulation directory with every report read by the analyzers of analyzer_collection.py"""
+    age_bins = age_bins or AGE_BINS
+    inset_channels = inset_channels or INSET_CHANNELS
+    events = events or EVENTS
+    ndays = 365 * years
+    output_dir = os.path.join(sim_dir, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(sim_dir, 'tags.json'), 'w') as f:
+        json.dump(tags, f)
+
+    write_json(os.path.join(output_dir, 'InsetChart.json'), inset_chart(rng, ndays, inset_channels))
+    write_json(os.path.join(output_dir, 'ReportMalariaFiltered.json'), inset_chart(rng, ndays, inset_channels))
+    write_json(os.path.join(output_dir, 'ReportEventCounter.json'), inset_chart(rng, ndays, events))
+    write_json(os.path.join(output_dir, 'MalariaSummaryReport_Annual_Agebin.json'),
+               summary_report(rng, years, age_bins, 365))
+    for year in range(start_year, start_year + years):
+        write_json(os.path.join(output_dir, f'MalariaSummaryReport_Monthly_Agebin_{year}.json'),
+                   summary_report(rng, 13, age_bins, 30))
+        write_json(os.path.join(output_dir, f'MalariaSummaryReport_Monthly_U5_{year}.json'),
+                   summary_report(rng, 13, [0.25, 5, 125], 30))
+        write_json(os.path.join(output_dir, f'MalariaSummaryReport_Monthly_U10_{year}.json'),
+                   summary_report(rng, 13, [0.25, 10, 125], 30))
+        write_json(os.path.join(output_dir, f'MalariaSummaryReport_Weekly_U5_{year}.json'),
+                   summary_report(rng, 53, [0.25, 5, 125], 7))
+    write_json(os.path.join(output_dir, 'MalariaSummaryReport_Monthly_U5.json'),
+               summary_report(rng, 12 * years, [0.25, 5, 125], 365 / 12))
+    event_recorder(rng, ndays, events, event_rows_per_year).to_csv(
+        os.path.join(output_dir, 'ReportEventRecorder.csv'), index=False)
+
+
+def write_experiment(experiment_dir, num_seeds=2, sweep=None, start_year=2020, years=10, age_bins=None,
+                     inset_channels=None, events=None, event_rows_per_year=20000, seed=0):
+    """Write one simulation directory per sweep combination and seed, named by simulation id.
+    sweep maps tag names to lists of values, e.g. {'itn_coverage': [0.5, 0.8]}. Returns the simulation ids."""
+    sweep = sweep or {'itn_coverage': [0.5, 0.8]}
+    rng = np.random.default_rng(seed)
+    sim_ids = []
+    for combo in itertools.product(*sweep.values()):
+        for run_number in range(num_seeds):
+            sim_id = '%08x-0000-0000-0000-%012x' % (seed, len(sim_ids))
+            tags = {**dict(zip(sweep.keys(), combo)), 'Run_Number': run_number}
+            write_simulation(os.path.join(experiment_dir, sim_id), tags, rng, start_year=start_year, years=years,
+                             age_bins=age_bins, inset_channels=inset_channels, events=events,
+                             event_rows_per_year=event_rows_per_year)
+            sim_ids.append(sim_id)
+    return sim_ids
+
+
+if __name__ == "__main__":
+    experiment_dir = os.path.join('simulation_outputs', 'synthetic_experiment')
+    sim_ids = write_experiment(experiment_dir, num_seeds=5, sweep={'itn_coverage': [0.5, 0.8]}, years=10)
+    print(f'Wrote {len(sim_ids)} simulations to {experiment_dir}')
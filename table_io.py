@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+
+"""
+Analyzer output tables in CSV, Parquet or Feather format
+"""
+
+TABLE_FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+
+def table_path(path, output_format):
+    """Path of a table in the given format, path may carry any (or no) extension"""
+    if output_format not in TABLE_FORMATS:
+        raise ValueError(f'Unknown output format {output_format}, use one of {list(TABLE_FORMATS)}')
+    stem, ext = os.path.splitext(path)
+    if ext not in TABLE_FORMATS.values():
+        stem = path
+    return stem + TABLE_FORMATS[output_format]
+
+
+def write_table(df, path, output_format='csv', categorical_columns=None, compression='zstd'):
+    """Write df as csv, or as a compressed columnar parquet/feather file (needs pyarrow) where
+    categorical_columns, typically the sweep variables, are stored dictionary-encoded.
+    Returns the path written."""
+    path = table_path(path, output_format)
+    if output_format == 'csv':
+        df.to_csv(path, index=False)
+        return path
+
+    df = df.reset_index(drop=True)
+    for col in categorical_columns or []:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if output_format == 'parquet':
+        df.to_parquet(path, index=False, compression=compression)
+    else:
+        df.to_feather(path, compression=compression)
+    return path
+
+
+def load_table(path, categorical=False, **kwargs):
+    """Read a table written by write_table. path can be given with any extension (e.g. the usual .csv name),
+    the most recently written of the csv/parquet/feather files is read. Dictionary-encoded columns come back
+    with their original dtype unless categorical=True. Extra keyword arguments go to the underlying reader."""
+    candidates = [p for p in (table_path(path, fmt) for fmt in TABLE_FORMATS) if os.path.exists(p)]
+    if not candidates:
+        raise FileNotFoundError(f'No csv, parquet or feather table found for {path}')
+    path = max(candidates, key=os.path.getmtime)
+
+    if path.endswith('.csv'):
+        return pd.read_csv(path, **kwargs)
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, **kwargs)
+    else:
+        df = pd.read_feather(path, **kwargs)
+    if not categorical:
+        for col in df.select_dtypes('category').columns:
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
@@ -0,0 +1,165 @@
+import copy
+import json
+import pytest
+from campaign_templates import CampaignTemplate
+
+"""
+Campaign templates against direct calls of their intervention function, on a config builder reduced to what
+intervention functions use (config parameters and campaign events).
+"""
+
+
+class ConfigBuilder:
+
+    def __init__(self):
+        self.config = {'parameters': {'Simulation_Duration': 3650, 'Listed_Events': ['Births']}}
+        self.campaign = {'Events': [{'Start_Day': 0, 'Event_Coordinator_Config': {'Demographic_Coverage': 1}}]}
+        self.custom_reports = []
+
+    def add_event(self, event):
+        self.campaign['Events'].append(event)
+
+    def update_params(self, params):
+        self.config['parameters'].update(params)
+
+
+def add_itn(cb, start, coverage, killing=0.7):
+    cb.add_event({'Start_Day': start,
+                  'Event_Coordinator_Config': {'Demographic_Coverage': coverage,
+                                               'Intervention_Config': {'Killing_Config': {'Initial_Effect': killing},
+                                                                       'Seasonal': [0.03, 0.1, 0.03]}}})
+    cb.update_params({'Enable_Vector_Interventions': 1})
+
+
+def itn_intervention(cb, coverage_level=0.5, killing=0.7):
+    for start in [365, 3 * 365, 5 * 365]:
+        add_itn(cb, start, coverage_level, killing)
+    return {'itn_coverage': coverage_level}
+
+
+def scaled_itn_intervention(cb, coverage_level):
+    add_itn(cb, 365, coverage_level * 0.75)
+    return {}
+
+
+def conditional_itn_intervention(cb, coverage_level):
+    if coverage_level > 0:
+        add_itn(cb, 365, coverage_level)
+    return {}
+
+
+def irs_intervention(cb, coverage_level=0.6):
+    cb.add_event({'Start_Day': 400, 'Event_Coordinator_Config': {'Demographic_Coverage': coverage_level}})
+    cb.update_params({'Listed_Events': cb.config['parameters']['Listed_Events'] + ['Received_IRS']})
+    return {'irs_coverage': coverage_level}
+
+
+def listed_itn_intervention(cb, coverage_level=0.5):
+    tags = itn_intervention(cb, coverage_level)
+    cb.update_params({'Listed_Events': cb.config['parameters']['Listed_Events'] + ['Bednet_Got_New_One']})
+    return tags
+
+
+def reported_itn_intervention(cb, coverage_level=0.5):
+    cb.custom_reports.append({'Report': 'ReportEventCounter', 'Events': ['Bednet_Got_New_One']})
+    return itn_intervention(cb, coverage_level)
+
+
+def direct_and_templated(template, add_fn, **kwargs):
+    direct, templated = ConfigBuilder(), ConfigBuilder()
+    direct_tags = add_fn(direct, **kwargs)
+    templated_tags = template(templated, **kwargs)
+    return (direct, direct_tags), (templated, templated_tags)
+
+
+def assert_same_simulation(direct, templated):
+    (direct_cb, direct_tags), (templated_cb, templated_tags) = direct, templated
+    assert json.dumps(templated_cb.campaign) == json.dumps(direct_cb.campaign)
+    assert templated_cb.config == direct_cb.config
+    assert templated_tags == direct_tags
+
+
+@pytest.mark.parametrize('coverage_level', [0.1, 0.45, 0.9])
+def test_swept_argument_matches_direct_call(coverage_level):
+    template = CampaignTemplate(ConfigBuilder(), itn_intervention, 'coverage_level')
+    assert_same_simulation(*direct_and_templated(template, itn_intervention, coverage_level=coverage_level))
+
+
+def test_fixed_arguments_match_direct_call():
+    template = CampaignTemplate(ConfigBuilder(), itn_intervention, 'coverage_level', killing=0.4)
+    direct, templated = ConfigBuilder(), ConfigBuilder()
+    direct_tags = itn_intervention(direct, coverage_level=0.6, killing=0.4)
+    assert_same_simulation((direct, direct_tags), (templated, template(templated, coverage_level=0.6)))
+
+
+def test_no_swept_argument_matches_direct_call():
+    template = CampaignTemplate(ConfigBuilder(), itn_intervention)
+    assert_same_simulation(*direct_and_templated(template, itn_intervention))
+
+
+def test_start_shift():
+    template = CampaignTemplate(ConfigBuilder(), itn_intervention, 'coverage_level')
+    cb = ConfigBuilder()
+    tags = template(cb, start_shift=30, coverage_level=0.6)
+    assert [event['Start_Day'] for event in cb.campaign['Events']] == [0, 395, 3 * 365 + 30, 5 * 365 + 30]
+    assert tags == {'itn_coverage': 0.6, 'itn_intervention_start_shift': 30}
+
+
+def test_templates_share_unswept_events():
+    template = CampaignTemplate(ConfigBuilder(), itn_intervention, 'coverage_level')
+    first, second = ConfigBuilder(), ConfigBuilder()
+    template(first, coverage_level=0.2)
+    template(second, coverage_level=0.8)
+    seasonal = [event['Event_Coordinator_Config']['Intervention_Config']['Seasonal']
+                for event in (first.campaign['Events'][1], second.campaign['Events'][1])]
+    assert seasonal[0] is seasonal[1]
+    assert first.campaign['Events'][1]['Event_Coordinator_Config']['Demographic_Coverage'] == 0.2
+
+
+def test_template_does_not_change_the_config_builder_it_is_built_from():
+    cb = ConfigBuilder()
+    before = copy.deepcopy(cb.campaign), copy.deepcopy(cb.config)
+    CampaignTemplate(cb, itn_intervention, 'coverage_level')
+    assert (cb.campaign, cb.config) == before
+
+
+def test_list_parameters_are_merged():
+    cb = ConfigBuilder()
+    itn = CampaignTemplate(cb, listed_itn_intervention, 'coverage_level')
+    irs = CampaignTemplate(cb, irs_intervention, 'coverage_level')
+    direct, templated = ConfigBuilder(), ConfigBuilder()
+    direct_tags = dict(listed_itn_intervention(direct, coverage_level=0.3),
+                       **irs_intervention(direct, coverage_level=0.7))
+    templated_tags = dict(itn(templated, coverage_level=0.3), **irs(templated, coverage_level=0.7))
+    assert templated.config['parameters']['Listed_Events'] == ['Births', 'Bednet_Got_New_One', 'Received_IRS']
+    assert_same_simulation((direct, direct_tags), (templated, templated_tags))
+
+
+def test_changes_outside_parameters_and_events_raise():
+    with pytest.raises(ValueError, match='changes more of the config builder'):
+        CampaignTemplate(ConfigBuilder(), reported_itn_intervention, 'coverage_level')
+
+
+def test_scaled_argument_raises():
+    with pytest.raises(ValueError, match='does not use coverage_level as it is'):
+        CampaignTemplate(ConfigBuilder(), scaled_itn_intervention, 'coverage_level')
+
+
+def test_events_depending_on_argument_raise():
+    with pytest.raises(ValueError, match='depend on coverage_level'):
+        CampaignTemplate(ConfigBuilder(), conditional_itn_intervention, 'coverage_level')
+
+
+def test_argument_not_swept_raises():
+    template = CampaignTemplate(ConfigBuilder(), itn_intervention, 'coverage_level')
+    with pytest.raises(TypeError, match='killing'):
+        template(ConfigBuilder(), coverage_level=0.5, killing=0.4)
+    untemplated = CampaignTemplate(ConfigBuilder(), itn_intervention)
+    with pytest.raises(TypeError, match='coverage_level'):
+        untemplated(ConfigBuilder(), coverage_level=0.5)
+
+
+def test_missing_swept_argument_raises():
+    template = CampaignTemplate(ConfigBuilder(), itn_intervention, 'coverage_level')
+    with pytest.raises(TypeError, match='missing swept arguments'):
+        template(ConfigBuilder())